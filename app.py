@@ -3,110 +3,272 @@ import os
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 
-from flask import Flask, render_template, jsonify, request
-import csv
+from flask import Flask, render_template, jsonify, request, g
 import os
+import json
 import random
-from datetime import datetime, timedelta
+import time
+import uuid
+import hashlib
+from datetime import datetime, timedelta, timezone
 import numpy as np
 
 # Import the predictor
 from data.model_integration import predictor
+from data.dataset_cache import dataset_cache
+from data.columnar import build_columns, columns_to_json, columns_to_binary
+from data.outbreak_index import OutbreakIndex, parse_query_date
+from data.clusters import WORLD_BBOX, build_cluster_pyramid, query_clusters
+from data.prediction_cache import PredictionCache
+from data.jobs import JobManager, JobQueueFull
+from data.single_flight import SingleFlight
+from data.http_cache import EncodedBodyCache, choose_encoding, encoded_etag, etag_variants
+from data import metrics
 
 app = Flask(__name__)
 app.config['TEMPLATES_AUTO_RELOAD'] = True
 
-# Store predictions in memory (in a real app, use a database)
-predictions_cache = {}
+# Prediction results keyed by (client_id, country, interval, date), bounded with LRU + TTL.
+# Each worker process has its own cache; which predictions a client is currently showing
+# lives in a cookie, so any worker can rebuild them on a miss.
+predictions_cache = PredictionCache(
+    max_entries=int(os.environ.get('PREDICTION_CACHE_SIZE', 1024)),
+    ttl=int(os.environ.get('PREDICTION_CACHE_TTL', 3600))
+)
+# /api/data bodies, raw and gzip/brotli encoded, built once per data version and prediction state
+payload_cache = EncodedBodyCache(max_entries=int(os.environ.get('PAYLOAD_CACHE_SIZE', 64)))
 
-def load_data():
-    actual_data = []
-    csv_path = os.path.join('data', 'wahis_outbreak_details.csv')
-    
+# Identical (country, interval, date) predictions from any client share one in-flight
+# computation, and its result is reused for a few seconds to absorb bursts
+prediction_flights = SingleFlight(result_ttl=float(os.environ.get('PREDICTION_COALESCE_TTL', 2)))
+
+# Background executor for /api/jobs; the queue depth bounds how much work can pile up
+prediction_jobs = JobManager(
+    max_workers=int(os.environ.get('PREDICTION_JOB_WORKERS', 2)),
+    max_pending=int(os.environ.get('PREDICTION_JOB_QUEUE', 32))
+)
+
+CLIENT_COOKIE = 'client_id'
+ACTIVE_PREDICTIONS_COOKIE = 'active_predictions'
+
+# Selections honoured from the cookie (the app sets one); the rest are ignored
+MAX_ACTIVE_PREDICTIONS = 8
+
+# Query parameters that switch /api/data to an indexed subset of the records
+QUERY_PARAMS = ('from', 'to', 'country', 'limit', 'offset')
+
+# Rows encoded per chunk when /api/data streams NDJSON
+STREAM_CHUNK_ROWS = 500
+
+# Upper bound on the number of items accepted by /api/predict_batch
+MAX_BATCH_PREDICTIONS = 1000
+
+# Longest multi-step forecast /api/predict accepts (two years of weeks)
+MAX_PREDICTION_HORIZON = 104
+
+def load_dataset():
+    """Return the cached DatasetEntry for the CSV, or None if it cannot be read"""
     try:
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                try:
-                    if row['lat_long'] and row['lat_long'] != '-':
-                        lat, lon = row['lat_long'].split(',')
-                        row['lat'] = float(lat.strip())
-                        row['lon'] = float(lon.strip())
-                    else:
-                        row['lat'] = None
-                        row['lon'] = None
-                except Exception as e:
-                    print(f"Error parsing coordinates: {e}")
-                    row['lat'] = None
-                    row['lon'] = None
-                    
-                row['start_date'] = row['start_date'] if row['start_date'] != '-' else None
-                row['end_date'] = row['end_date'] if row['end_date'] != '-' else None
-                
-                actual_data.append(row)
+        return dataset_cache.get()
     except Exception as e:
         print(f"Error loading data: {e}")
-        # Return some sample data if the file doesn't exist
-        actual_data = [
-            {
-                'country': 'United States',
-                'location': 'California',
-                'start_date': '2023/06/01',
-                'end_date': '2023/06/15',
-                'cases': '450',
-                'deaths': '45',
-                'lat': 37.09,
-                'lon': -95.71
-            },
-            {
-                'country': 'Brazil',
-                'location': 'Amazonas',
-                'start_date': '2023/07/10',
-                'end_date': '2023/07/25',
-                'cases': '380',
-                'deaths': '38',
-                'lat': -14.24,
-                'lon': -51.93
-            },
-            {
-                'country': 'India',
-                'location': 'Mumbai',
-                'start_date': '2023/09/05',
-                'end_date': '2023/09/20',
-                'cases': '620',
-                'deaths': '62',
-                'lat': 20.59,
-                'lon': 78.96
-            },
-            {
-                'country': 'Australia',
-                'location': 'Outback',
-                'start_date': '2023/05/15',
-                'end_date': '2023/05/30',
-                'cases': '290',
-                'deaths': '29',
-                'lat': -25.27,
-                'lon': 133.78
-            },
-            {
-                'country': 'South Africa',
-                'location': 'Northern Cape',
-                'start_date': '2023/08/01',
-                'end_date': '2023/08/15',
-                'cases': '460',
-                'deaths': '46',
-                'lat': -30.56,
-                'lon': 22.94
-            }
-        ]
+        return None
+
+def load_data():
+    entry = load_dataset()
+    if entry is not None:
+        return entry.rows
+    
+    # Return some sample data if the file doesn't exist
+    actual_data = [
+        {
+            'country': 'United States',
+            'location': 'California',
+            'start_date': '2023/06/01',
+            'end_date': '2023/06/15',
+            'cases': '450',
+            'deaths': '45',
+            'lat': 37.09,
+            'lon': -95.71
+        },
+        {
+            'country': 'Brazil',
+            'location': 'Amazonas',
+            'start_date': '2023/07/10',
+            'end_date': '2023/07/25',
+            'cases': '380',
+            'deaths': '38',
+            'lat': -14.24,
+            'lon': -51.93
+        },
+        {
+            'country': 'India',
+            'location': 'Mumbai',
+            'start_date': '2023/09/05',
+            'end_date': '2023/09/20',
+            'cases': '620',
+            'deaths': '62',
+            'lat': 20.59,
+            'lon': 78.96
+        },
+        {
+            'country': 'Australia',
+            'location': 'Outback',
+            'start_date': '2023/05/15',
+            'end_date': '2023/05/30',
+            'cases': '290',
+            'deaths': '29',
+            'lat': -25.27,
+            'lon': 133.78
+        },
+        {
+            'country': 'South Africa',
+            'location': 'Northern Cape',
+            'start_date': '2023/08/01',
+            'end_date': '2023/08/15',
+            'cases': '460',
+            'deaths': '46',
+            'lat': -30.56,
+            'lon': 22.94
+        }
+    ]
+    for row in actual_data:
+        row['type'] = 'actual'
     
     return actual_data
 
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    metrics.REQUESTS_IN_FLIGHT.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.REQUEST_LATENCY.observe(time.perf_counter() - g.request_start, route, request.method)
+    metrics.REQUESTS.inc(route, request.method, str(response.status_code))
+    return response
+
+@app.teardown_request
+def finish_request(exc):
+    # Runs even when a view raised, so the in-flight gauge cannot drift
+    if 'request_start' in g:
+        metrics.REQUESTS_IN_FLIGHT.dec()
+
+def collect_cache_metrics():
+    stats = predictions_cache.stats()
+    metrics.PREDICTION_CACHE_HITS.set(stats['hits'])
+    metrics.PREDICTION_CACHE_MISSES.set(stats['misses'])
+    metrics.PREDICTION_CACHE_EVICTIONS.set(stats['evictions'])
+    metrics.PREDICTION_CACHE_ENTRIES.set(stats['size'])
+    metrics.PREDICTION_CACHE_HIT_RATIO.set(stats['hit_rate'])
+    metrics.PREDICTIONS_COALESCED.set(prediction_flights.coalesced)
+    memo_stats = predictor.memo.stats()
+    metrics.PREDICTOR_MEMO_HITS.set(memo_stats['hits'])
+    metrics.PREDICTOR_MEMO_MISSES.set(memo_stats['misses'])
+    metrics.PREDICTOR_MEMO_ENTRIES.set(memo_stats['size'])
+    metrics.PREDICTOR_MEMO_BYTES.set(memo_stats['bytes'])
+
+metrics.registry.add_collector(collect_cache_metrics)
+
+@app.route('/metrics')
+def get_metrics():
+    """Expose request, prediction and cache metrics in Prometheus text format"""
+    return app.response_class(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+def get_client_id():
+    """Identify the browser by a random cookie, issued on first contact"""
+    client_id = request.cookies.get(CLIENT_COOKIE)
+    if not client_id:
+        client_id = g.get('new_client_id') or str(uuid.uuid4())
+        g.new_client_id = client_id
+    return client_id
+
+@app.after_request
+def set_client_cookie(response):
+    if g.get('new_client_id'):
+        response.set_cookie(CLIENT_COOKIE, g.new_client_id, httponly=True, samesite='Lax')
+    return response
+
+def get_active_predictions():
+    """
+    Return the (country, interval, date) selections this client is showing.
+    The cookie is client-controlled: malformed entries are dropped.
+    """
+    try:
+        keys = json.loads(request.cookies.get(ACTIVE_PREDICTIONS_COOKIE, '[]'))
+    except (ValueError, TypeError):
+        return []
+    if not isinstance(keys, list):
+        return []
+    return [
+        tuple(key) for key in keys
+        if isinstance(key, list) and len(key) == 3 and all(isinstance(part, str) for part in key)
+        and valid_prediction_date(key[1], key[2])
+    ][:MAX_ACTIVE_PREDICTIONS]
+
+def set_active_predictions(response, keys):
+    response.set_cookie(ACTIVE_PREDICTIONS_COOKIE, json.dumps([list(key) for key in keys]),
+                        httponly=True, samesite='Lax')
+    return response
+
+def valid_prediction_date(interval, date_str):
+    """True when date_str is a date string the predictor can use as the interval's target date"""
+    if not isinstance(date_str, str):
+        return False
+    try:
+        predictor.normalize_target_date(interval, date_str)
+        return True
+    except (ValueError, TypeError, OverflowError):
+        return False
+
+def shared_predict(country, interval, date_str):
+    """Run predictor.predict, sharing the work with identical concurrent requests"""
+    return prediction_flights.do((country, interval, date_str), lambda: predictor.predict(country, interval, date_str))
+
+def lookup_prediction(country, interval, date_str):
+    """Return the cached prediction for this client, running the model on a miss"""
+    if country == 'all':
+        # The total of the per-country forecasts, so the map and the total agree
+        return predictor.aggregate_forecasts(interval, lookup_country_forecasts(interval, date_str))
+    cache_key = (get_client_id(), country, interval, date_str)
+    outbreaks_count = predictions_cache.get(cache_key)
+    if outbreaks_count is None:
+        outbreaks_count = shared_predict(country, interval, date_str)
+        predictions_cache.put(cache_key, outbreaks_count)
+    return outbreaks_count
+
+def lookup_country_forecasts(interval, date_str):
+    """Per-country forecasts behind an 'all' prediction, cached and shared like single predictions"""
+    cache_key = (get_client_id(), 'all', interval, date_str, 'countries')
+    forecasts = predictions_cache.get(cache_key)
+    if forecasts is None:
+        forecasts = prediction_flights.do(('all', interval, date_str, 'countries'),
+                                          lambda: predictor.forecast_all_countries(interval, date_str))
+        predictions_cache.put(cache_key, forecasts)
+    return forecasts
+
+def lookup_trajectories(country, interval, date_str, horizon):
+    """
+    Per-country multi-step forecasts ({country: [values]}) starting at date_str,
+    cached and shared like single predictions
+    """
+    countries = predictor.countries_48 if country == 'all' else [country]
+    cache_key = (get_client_id(), country, interval, date_str, 'horizon', horizon)
+    trajectories = predictions_cache.get(cache_key)
+    if trajectories is None:
+        trajectories = prediction_flights.do(
+            (country, interval, date_str, 'horizon', horizon),
+            lambda: predictor.forecast_horizon(countries, interval, horizon, date_str))
+        predictions_cache.put(cache_key, trajectories)
+    return trajectories
+
 def generate_prediction_data(actual_data):
     prediction_data = []
     
-    # Check if we have any predictions in cache
-    if not predictions_cache:
+    # Check if this client has any predictions selected
+    active_predictions = get_active_predictions()
+    if not active_predictions:
         return prediction_data
     
     # Country center coordinates (approximate)
@@ -168,19 +330,13 @@ def generate_prediction_data(actual_data):
     }
     
     # Convert cached predictions to the format expected by the frontend
-    for prediction_key, prediction_value in predictions_cache.items():
-        # Parse the prediction key (format: country_interval_date)
-        parts = prediction_key.split('_')
-        if len(parts) < 3:
-            continue
-            
-        country = parts[0]
-        interval = parts[1]
-        date_str = '_'.join(parts[2:])
-        
-        # For "all" countries prediction, create markers for each country
+    for country, interval, date_str in active_predictions:
+        # For "all" countries prediction, create a marker with each country's own forecast
         if country == 'all':
-            for country_name, coords in country_centers.items():
+            for country_name, prediction_value in lookup_country_forecasts(interval, date_str).items():
+                if country_name not in country_centers:
+                    continue
+                coords = country_centers[country_name]
                 template = {
                     'country': country_name,
                     'location': f'Predicted Outbreak in {country_name}',
@@ -194,6 +350,8 @@ def generate_prediction_data(actual_data):
                 }
                 prediction_data.append(template)
         else:
+            prediction_value = lookup_prediction(country, interval, date_str)
+            
             # For specific country prediction
             if country in country_centers:
                 coords = country_centers[country]
@@ -210,7 +368,9 @@ def generate_prediction_data(actual_data):
                 }
                 prediction_data.append(template)
             else:
-                # Fallback for unknown countries - use a random location
+                # Fallback for unknown countries - a placeholder location seeded from the
+                # name, so the body (and its ETag) is the same on every request
+                placeholder = random.Random(country)
                 template = {
                     'country': country,
                     'location': f'Predicted Outbreak in {country}',
@@ -218,37 +378,235 @@ def generate_prediction_data(actual_data):
                     'end_date': None,
                     'cases': str(prediction_value),
                     'deaths': str(max(1, prediction_value // 10)),
-                    'lat': random.uniform(-60, 85),
-                    'lon': random.uniform(-180, 180),
+                    'lat': placeholder.uniform(-60, 85),
+                    'lon': placeholder.uniform(-180, 180),
                     'type': 'prediction'
                 }
                 prediction_data.append(template)
     
     return prediction_data
 
+def models_loading_response():
+    """503 returned by prediction endpoints until the background model loader has finished"""
+    response = jsonify({"error": "Models are still loading, please retry shortly."})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: models loaded and warmed up, data prepared"""
+    state = predictor.readiness()
+    return jsonify(state), 200 if state['ready'] else 503
+
 @app.route('/')
 def index():
-    # Clear predictions when the page is loaded
-    predictions_cache.clear()
-    return render_template('index.html')
+    # Clear this client's displayed predictions when the page is loaded; results stay cached
+    return set_active_predictions(app.make_response(render_template('index.html')), [])
+
+def derive_from_dataset(entry, actual_data, name, builder):
+    """Reuse a value built once per data version, or build it directly for the sample data"""
+    if entry is None:
+        return builder(actual_data)
+    return entry.derive(name, lambda e: builder(e.rows))
+
+def dataset_columns(entry, actual_data):
+    """The columnar fields of the rows, taken from the typed table when there is one"""
+    if entry is None or entry.table is None:
+        return build_columns(actual_data)
+    return entry.derive('columns', lambda e: e.table.column_lists())
+
+def wants_stream():
+    """True for ?stream=1 or a client that prefers NDJSON over JSON"""
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+def stream_records(actual_data, prediction_data, indices=None):
+    """Stream one JSON record per line, encoding the rows a chunk at a time"""
+    def generate():
+        selected = range(len(actual_data)) if indices is None else indices
+        for start in range(0, len(selected), STREAM_CHUNK_ROWS):
+            chunk = selected[start:start + STREAM_CHUNK_ROWS]
+            yield ''.join(json.dumps(actual_data[i], separators=(',', ':')) + '\n' for i in chunk)
+        for prediction in prediction_data:
+            yield json.dumps(prediction, separators=(',', ':')) + '\n'
+    return app.response_class(generate(), mimetype='application/x-ndjson')
+
+def query_data(entry, actual_data):
+    """Serve /api/data?from=&to=&country=&limit=&offset= from the per-version index"""
+    try:
+        start_day = parse_query_date(request.args['from']) if request.args.get('from') else None
+        end_day = parse_query_date(request.args['to']) if request.args.get('to') else None
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args['limit']) if request.args.get('limit') else None
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("limit and offset must not be negative")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Repeated ?country= values or a comma-separated list are both accepted; each country counts once
+    countries = list(dict.fromkeys(c for value in request.args.getlist('country') for c in value.split(',') if c))
+    
+    index = derive_from_dataset(entry, actual_data, 'index', OutbreakIndex)
+    hits = index.query(start_day, end_day, countries)
+    page = hits[offset:offset + limit if limit is not None else None]
+    
+    prediction_data = generate_prediction_data(actual_data)
+    if countries:
+        prediction_data = [p for p in prediction_data if p['country'] in countries]
+    
+    if wants_stream():
+        return stream_records(actual_data, prediction_data, page)
+    
+    body = ('{"actual":' + index.rows_json(page) + ',"prediction":' + json.dumps(prediction_data) +
+            ',"total":' + str(len(hits)) + ',"offset":' + str(offset) + ',"limit":' + json.dumps(limit) + '}')
+    return app.response_class(body, mimetype='application/json')
+
+def cached_payload_response(entry, tag, mimetype, build_body, has_client_state=False):
+    """
+    Serve a dataset payload with ETag/Last-Modified from the data version,
+    answering 304 when the client already has it. Bodies are built and
+    compressed once per (version, tag, encoding) and then reused.
+    """
+    if entry is None:
+        return app.response_class(build_body(), mimetype=mimetype)
+    
+    etag = f"{entry.version}-{tag}"
+    encoding = choose_encoding(request.accept_encodings)
+    last_modified = datetime.fromtimestamp(int(entry.mtime), timezone.utc)
+    if request.if_none_match:
+        # Each coding has its own tag; a client holding any of them has the current payload
+        not_modified = any(request.if_none_match.contains_weak(variant) for variant in etag_variants(etag))
+    else:
+        # Last-Modified only tracks the CSV, so it cannot validate per-client predictions
+        not_modified = (not has_client_state and request.if_modified_since is not None
+                        and request.if_modified_since >= last_modified)
+    
+    if not_modified:
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(payload_cache.get(etag, encoding, build_body), mimetype=mimetype)
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(encoded_etag(etag, encoding))
+    response.last_modified = last_modified
+    # Let browsers keep the body but revalidate it on every poll
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    response.vary.add('Cookie')
+    return response
 
 @app.route('/api/data')
 def get_data():
     try:
-        actual_data = load_data()
+        entry = load_dataset()
+        actual_data = entry.rows if entry is not None else load_data()
+        version = entry.version if entry is not None else 'sample'
+        data_format = request.args.get('format', 'rows')
+        
+        if any(param in request.args for param in QUERY_PARAMS):
+            return query_data(entry, actual_data)
+        
+        if data_format == 'binary':
+            # Predictions are small and irregular, so the binary variant only carries actual rows
+            def build_binary():
+                columns = dataset_columns(entry, actual_data)
+                return derive_from_dataset(entry, actual_data, 'columns_binary',
+                                           lambda rows: columns_to_binary(columns, version))
+            return cached_payload_response(entry, 'binary', 'application/octet-stream', build_binary)
+        
         prediction_data = generate_prediction_data(actual_data)
         
-        for row in actual_data:
-            row['type'] = 'actual'
+        if wants_stream():
+            return stream_records(actual_data, prediction_data)
         
-        return jsonify({
-            'actual': actual_data,
-            'prediction': prediction_data
-        })
+        # The actual rows are serialized once per data version, only predictions are encoded here
+        prediction_json = json.dumps(prediction_data)
+        if data_format == 'columnar':
+            def build_body():
+                columns = dataset_columns(entry, actual_data)
+                actual_json = derive_from_dataset(entry, actual_data, 'columns_json',
+                                                  lambda rows: columns_to_json(columns))
+                return ('{"format":"columnar","version":' + json.dumps(version) +
+                        ',"actual":' + actual_json + ',"prediction":' + prediction_json + '}')
+        else:
+            def build_body():
+                actual_json = entry.rows_json if entry is not None else json.dumps(actual_data)
+                return '{"actual":' + actual_json + ',"prediction":' + prediction_json + '}'
+        
+        # The body also depends on this client's predictions, so they are part of the validator
+        tag = f"{data_format}-{hashlib.sha1(prediction_json.encode('utf-8')).hexdigest()[:12]}"
+        return cached_payload_response(entry, tag, 'application/json', build_body,
+                                       has_client_state=bool(prediction_data))
     except Exception as e:
         print(f"Error in get_data: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/clusters')
+def get_clusters():
+    """Return outbreak clusters for ?zoom=&bbox=west,south,east,north"""
+    try:
+        zoom = int(request.args.get('zoom', 0))
+        bbox = tuple(float(v) for v in request.args['bbox'].split(',')) if request.args.get('bbox') else WORLD_BBOX
+        if len(bbox) != 4:
+            raise ValueError("bbox must be west,south,east,north")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        entry = load_dataset()
+        if entry is not None:
+            features = query_clusters(entry, zoom, bbox)
+        else:
+            actual_data = load_data()
+            features = build_cluster_pyramid(actual_data).query(actual_data, zoom, bbox)
+        return jsonify({'zoom': zoom, 'clusters': features})
+    except Exception as e:
+        print(f"Error in get_clusters: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/stats')
+def get_stats():
+    """
+    Per country x interval x year outbreak statistics (counts, means, last
+    value, case/death sums, coverage), optionally narrowed with
+    ?interval=, ?country= and ?year= (each repeatable or comma-separated)
+    """
+    def values(name):
+        selected = [v for value in request.args.getlist(name) for v in value.split(',') if v]
+        return set(selected) if selected else None
+
+    intervals, countries, years = values('interval'), values('country'), values('year')
+    if intervals is not None and not intervals <= {'weekly', 'monthly'}:
+        return jsonify({"error": "interval must be weekly or monthly"}), 400
+
+    try:
+        snapshot = predictor.snapshot
+        if snapshot.csv_state is None:
+            response = jsonify({"error": "Data is still loading, please retry shortly."})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        predictor.request_refresh()
+        return jsonify(snapshot.stats.query(intervals, countries, years))
+    except Exception as e:
+        print(f"Error in get_stats: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/invalidate_cache', methods=['POST'])
+def invalidate_cache():
+    """
+    Force the dataset cache to re-read the CSV. Only needed for edits that keep
+    the file's mtime and size (appends are picked up by the stat check), and
+    only affects the worker process that serves the request.
+    """
+    dataset_cache.invalidate()
+    return jsonify({"status": "success", "message": "Dataset cache invalidated"})
+
 @app.route('/api/predict', methods=['POST'])
 def predict_outbreaks():
     try:
@@ -256,49 +614,178 @@ def predict_outbreaks():
         date_str = data['date']
         interval = data['interval']
         country = data.get('country', 'all')
+        horizon = data.get('horizon')
         
         # Handle both 'annual' and 'annually' for backward compatibility
         if interval == 'annual':
             interval = 'annually'
-            
-        if not hasattr(predictor, 'models_loaded') or not predictor.models_loaded:
-            return jsonify({"error": "Models not loaded. Please check if the model files exist and are accessible."}), 500
         
-        # Clear previous predictions before making a new one
-        predictions_cache.clear()
+        if horizon is not None:
+            if isinstance(horizon, bool) or not isinstance(horizon, int) or not 1 <= horizon <= MAX_PREDICTION_HORIZON:
+                return jsonify({"error": f"'horizon' must be an integer from 1 to {MAX_PREDICTION_HORIZON}"}), 400
         
-        # Make prediction - use the new predict method
-        outbreaks_count = predictor.predict(country, interval)
+        # The prediction, the per-country forecasts and any trajectory are all for this date
+        if not valid_prediction_date(interval, date_str):
+            return jsonify({"error": f"Invalid date: {date_str}"}), 400
+            
+        if not predictor.ready.is_set():
+            return models_loading_response()
         
-        # Store the prediction in cache
-        prediction_key = f"{country}_{interval}_{date_str}"
-        predictions_cache[prediction_key] = outbreaks_count
+        # Make prediction - reuses this client's cached result when there is one
+        outbreaks_count = lookup_prediction(country, interval, date_str)
         
-        return jsonify({
+        # The new prediction replaces whatever this client was showing before
+        payload = {
             'status': 'success',
             'date': date_str,
             'predicted_outbreaks': outbreaks_count,
             'country': country
-        })
+        }
+        if country == 'all':
+            payload['country_predictions'] = lookup_country_forecasts(interval, date_str)
+        if horizon is not None:
+            # Outbreaks predicted for each of the next horizon periods
+            trajectories = lookup_trajectories(country, interval, date_str, horizon)
+            if country == 'all':
+                payload['trajectory'] = predictor.aggregate_trajectories(interval, trajectories)
+                payload['country_trajectories'] = trajectories
+            else:
+                payload['trajectory'] = trajectories[country]
+            payload['horizon'] = horizon
+        response = jsonify(payload)
+        return set_active_predictions(response, [(country, interval, date_str)])
     except Exception as e:
         print(f"Prediction error: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def parse_prediction_request(item):
+    """Return (country, interval, date) from a request body item"""
+    interval = item['interval']
+    # Handle both 'annual' and 'annually' for backward compatibility
+    if interval == 'annual':
+        interval = 'annually'
+    if not valid_prediction_date(interval, item['date']):
+        raise TypeError(f"invalid date {item['date']!r}")
+    return item.get('country', 'all'), interval, item['date']
+
+@app.route('/api/predict_batch', methods=['POST'])
+def predict_batch():
+    """Predict many (country, interval, date) requests with one model call per interval"""
+    try:
+        items = (request.json or {}).get('requests')
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "Expected a non-empty 'requests' list"}), 400
+        if len(items) > MAX_BATCH_PREDICTIONS:
+            return jsonify({"error": f"At most {MAX_BATCH_PREDICTIONS} predictions per batch"}), 400
+        
+        batch = [parse_prediction_request(item) for item in items]
+        
+        if not predictor.ready.is_set():
+            return models_loading_response()
+        
+        outbreak_counts = predictor.predict_many(batch)
+        
+        client_id = get_client_id()
+        predictions = []
+        for (country, interval, date_str), outbreaks_count in zip(batch, outbreak_counts):
+            predictions_cache.put((client_id, country, interval, date_str), outbreaks_count)
+            predictions.append({
+                'country': country,
+                'interval': interval,
+                'date': date_str,
+                'predicted_outbreaks': outbreaks_count
+            })
+        
+        return jsonify({'status': 'success', 'predictions': predictions})
+    except (KeyError, TypeError, AttributeError) as e:
+        return jsonify({"error": f"Invalid batch request: {e}"}), 400
+    except Exception as e:
+        print(f"Batch prediction error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_prediction_job():
+    """
+    Queue a prediction in the background and return its job id.
+    The body is either one {country, interval, date} or {"requests": [...]}.
+    """
+    try:
+        data = request.json or {}
+        if 'requests' in data:
+            if not isinstance(data['requests'], list) or not data['requests']:
+                return jsonify({"error": "Expected a non-empty 'requests' list"}), 400
+            if len(data['requests']) > MAX_BATCH_PREDICTIONS:
+                return jsonify({"error": f"At most {MAX_BATCH_PREDICTIONS} predictions per batch"}), 400
+            batch = [parse_prediction_request(item) for item in data['requests']]
+        else:
+            batch = [parse_prediction_request(data)]
+    except (KeyError, TypeError, AttributeError) as e:
+        return jsonify({"error": f"Invalid job request: {e}"}), 400
+    
+    if not predictor.ready.is_set():
+        return models_loading_response()
+    
+    # Captured here because the job runs outside the request context
+    client_id = get_client_id()
+    
+    def run():
+        if len(batch) == 1:
+            country, interval, date_str = batch[0]
+            outbreak_counts = [shared_predict(country, interval, date_str)]
+        else:
+            outbreak_counts = predictor.predict_many(batch)
+        results = []
+        for (country, interval, date_str), outbreaks_count in zip(batch, outbreak_counts):
+            predictions_cache.put((client_id, country, interval, date_str), outbreaks_count)
+            results.append({
+                'country': country,
+                'interval': interval,
+                'date': date_str,
+                'predicted_outbreaks': outbreaks_count
+            })
+        return results
+    
+    description = [{'country': c, 'interval': i, 'date': d} for c, i, d in batch]
+    try:
+        job_id = prediction_jobs.submit(run, description)
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 429
+    return jsonify({'status': 'queued', 'job_id': job_id, 'status_url': f'/api/jobs/{job_id}'}), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_prediction_job(job_id):
+    """Return the status of a job, plus its result once done"""
+    job = prediction_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_prediction_job(job_id):
+    """Cancel a queued job, or discard the result of a running one"""
+    job = prediction_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job)
+
 @app.route('/api/predictions')
 def get_predictions():
-    """Return all cached predictions"""
-    return jsonify(predictions_cache)
+    """Return the predictions this client is currently showing"""
+    return jsonify({
+        f"{country}_{interval}_{date_str}": lookup_prediction(country, interval, date_str)
+        for country, interval, date_str in get_active_predictions()
+    })
 
 @app.route('/api/clear_predictions', methods=['POST'])
 def clear_predictions():
-    """Clear all cached predictions"""
-    predictions_cache.clear()
-    return jsonify({"status": "success", "message": "Predictions cleared"})
+    """Clear this client's displayed predictions"""
+    response = jsonify({"status": "success", "message": "Predictions cleared"})
+    return set_active_predictions(response, [])
 
 @app.route('/api/has_predictions')
 def has_predictions():
-    """Check if there are any cached predictions"""
-    return jsonify({'has_predictions': len(predictions_cache) > 0})
+    """Check if this client has any predictions selected"""
+    return jsonify({'has_predictions': len(get_active_predictions()) > 0})
 
 if __name__ == '__main__':
     app.run(debug=True, use_reloader=False)
\ No newline at end of file
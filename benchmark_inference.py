@@ -0,0 +1,68 @@
+# benchmark_inference.py
+#
+# Single-sample CPU latency of each inference backend on real model inputs:
+#
+#     python convert_models.py          # once, for the tflite rows
+#     python benchmark_inference.py [iterations]
+#
+# Prints p50/p99 per model and backend plus the largest difference from the
+# Keras predict output, so a faster backend can be checked for equal results.
+import os
+import sys
+import time
+
+os.environ.setdefault('PREDICTOR_DEFER_MODEL_LOAD', '1')
+
+import numpy as np
+
+from data.inference_backends import BACKENDS, make_backend
+from data.model_integration import INPUT_SHAPES, MODEL_FILES, predictor
+
+
+def sample_inputs(model_type):
+    """One real input per country the model can serve"""
+    snapshot = predictor.snapshot
+    inputs = snapshot.inputs(model_type)
+    indices = np.flatnonzero(inputs.valid)
+    target_date = predictor.normalize_target_date(model_type, None)
+    return inputs.batch(indices, [snapshot.date_features(model_type, target_date)] * len(indices))
+
+
+def time_backend(backend, samples, iterations):
+    # Warm up (tracing, interpreter allocation) before timing
+    for i in range(10):
+        backend(samples[i % len(samples)][None])
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        sample = samples[i % len(samples)][None]
+        start = time.perf_counter()
+        backend(sample)
+        timings[i] = time.perf_counter() - start
+    return np.percentile(timings, 50) * 1000, np.percentile(timings, 99) * 1000
+
+
+def main(iterations):
+    predictor.load_model_files()
+    print(f"{'model':<8} {'backend':<9} {'p50 ms':>8} {'p99 ms':>8} {'max diff':>10}")
+    for model_type in INPUT_SHAPES:
+        model = getattr(predictor, f"{model_type}_model")
+        if model is None:
+            print(f"{model_type:<8} model not loaded")
+            continue
+        samples = sample_inputs(model_type)
+        if len(samples) == 0:
+            print(f"{model_type:<8} no country has enough data")
+            continue
+        reference = make_backend('keras', model, MODEL_FILES[model_type], INPUT_SHAPES[model_type])(samples)
+        for name in BACKENDS:
+            backend = make_backend(name, model, MODEL_FILES[model_type], INPUT_SHAPES[model_type])
+            if backend.name != name:
+                print(f"{model_type:<8} {name:<9} unavailable")
+                continue
+            p50, p99 = time_backend(backend, samples, iterations)
+            max_diff = float(np.abs(backend(samples) - reference).max())
+            print(f"{model_type:<8} {name:<9} {p50:8.3f} {p99:8.3f} {max_diff:10.2e}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,43 @@
+# convert_models.py
+#
+# Offline conversion of the .keras models to TFLite, for PREDICTOR_BACKEND=tflite:
+#
+#     python convert_models.py
+#
+# Writes models/global_weekly_model.tflite and models/global_monthly_model.tflite
+# next to the .keras files. Re-run whenever the models are retrained.
+import os
+
+import numpy as np
+
+from data.keras_layers import custom_objects, load_model
+from data.inference_backends import TFLiteBackend, convert_to_tflite, tflite_path
+from data.model_integration import INPUT_SHAPES, MODEL_FILES
+
+
+def convert_model(model_type):
+    model_file = MODEL_FILES[model_type]
+    # The custom OutbreakSequence/CountrySequence/DateSequence layers are plain
+    # slicing and casting ops, so they lower to builtin TFLite ops
+    model = load_model(model_file, custom_objects=custom_objects, compile=False)
+    content = convert_to_tflite(model, INPUT_SHAPES[model_type])
+    path = tflite_path(model_file)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+    # Check the converted model against Keras on random inputs with valid country ids
+    rng = np.random.default_rng(0)
+    inputs = rng.random((32,) + INPUT_SHAPES[model_type], dtype='float32')
+    inputs[:, :, 1] = rng.integers(0, 48, size=(32, 1))
+    expected = model.predict(inputs, verbose=0)
+    actual = TFLiteBackend(path)(inputs)
+    max_error = float(np.abs(expected - actual).max())
+    print(f"Wrote {path} ({len(content) / 1024:.0f} KB, max abs difference from Keras {max_error:.2e})")
+
+
+if __name__ == '__main__':
+    for model_type, model_file in MODEL_FILES.items():
+        if os.path.exists(model_file):
+            convert_model(model_type)
+        else:
+            print(f"Warning: Model file not found: {model_file}")
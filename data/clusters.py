@@ -0,0 +1,142 @@
+# data/clusters.py
+import math
+import threading
+
+from data.columnar import to_int
+
+# Deepest zoom level with its own grid; deeper requests reuse this one
+MAX_ZOOM = 16
+# Grid cells per 256px map tile, i.e. one cluster per ~64px square on screen
+CELLS_PER_TILE = 4
+MAX_LAT = 85.05112878
+
+WORLD_BBOX = (-180.0, -90.0, 180.0, 90.0)
+
+
+def mercator_x(lon):
+    return (lon + 180.0) / 360.0
+
+
+def mercator_y(lat):
+    lat = max(-MAX_LAT, min(MAX_LAT, lat))
+    sin_lat = math.sin(math.radians(lat))
+    return 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+
+
+def cells_at(zoom):
+    return CELLS_PER_TILE << zoom
+
+
+class ClusterPyramid:
+    """
+    Grid-based clustering of outbreak points for every zoom level 0..MAX_ZOOM.
+
+    Each level maps a Web Mercator grid cell to
+    [count, cases, deaths, sum of lat, sum of lon, first row index].
+    A cell at zoom z is the union of four cells at zoom z + 1, so adding a
+    point touches one cell per level and appended rows can be added in place.
+    """
+
+    def __init__(self):
+        self.levels = [{} for _ in range(MAX_ZOOM + 1)]
+        self.length = 0
+        self.digest = None
+
+    def add_rows(self, rows, start=0):
+        """Add rows[start:] to every level"""
+        top = cells_at(MAX_ZOOM)
+        for i in range(start, len(rows)):
+            row = rows[i]
+            lat, lon = row.get('lat'), row.get('lon')
+            if lat is None or lon is None:
+                continue
+            cx = min(top - 1, int(mercator_x(lon) * top))
+            cy = min(top - 1, int(mercator_y(lat) * top))
+            cases = to_int(row.get('cases')) or 0
+            deaths = to_int(row.get('deaths')) or 0
+            for zoom in range(MAX_ZOOM, -1, -1):
+                shift = MAX_ZOOM - zoom
+                key = (cx >> shift, cy >> shift)
+                cell = self.levels[zoom].get(key)
+                if cell is None:
+                    self.levels[zoom][key] = [1, cases, deaths, lat, lon, i]
+                else:
+                    cell[0] += 1
+                    cell[1] += cases
+                    cell[2] += deaths
+                    cell[3] += lat
+                    cell[4] += lon
+        self.length = len(rows)
+
+    def _cells_in(self, level, x_ranges, y0, y1):
+        """Yield (key, cell) for occupied cells inside the ranges, scanning whichever side is smaller"""
+        area = sum(x1 - x0 + 1 for x0, x1 in x_ranges) * (y1 - y0 + 1)
+        if area <= len(level):
+            for x0, x1 in x_ranges:
+                for cx in range(x0, x1 + 1):
+                    for cy in range(y0, y1 + 1):
+                        cell = level.get((cx, cy))
+                        if cell is not None:
+                            yield (cx, cy), cell
+        else:
+            for key, cell in level.items():
+                if y0 <= key[1] <= y1 and any(x0 <= key[0] <= x1 for x0, x1 in x_ranges):
+                    yield key, cell
+
+    def query(self, rows, zoom, bbox=WORLD_BBOX):
+        """Return the clusters for one zoom level inside bbox (west, south, east, north)"""
+        zoom = max(0, min(MAX_ZOOM, zoom))
+        west, south, east, north = bbox
+        n = cells_at(zoom)
+        x0 = max(0, min(n - 1, int(mercator_x(west) * n)))
+        x1 = max(0, min(n - 1, int(mercator_x(east) * n)))
+        y0 = max(0, min(n - 1, int(mercator_y(north) * n)))
+        y1 = max(0, min(n - 1, int(mercator_y(south) * n)))
+        # A bbox crossing the antimeridian has west > east
+        x_ranges = [(x0, x1)] if west <= east else [(x0, n - 1), (0, x1)]
+
+        features = []
+        for _, (count, cases, deaths, sum_lat, sum_lon, first) in self._cells_in(self.levels[zoom], x_ranges, y0, y1):
+            feature = {
+                'lat': sum_lat / count,
+                'lon': sum_lon / count,
+                'count': count,
+                'cases': cases,
+                'deaths': deaths,
+                'cluster': count > 1,
+            }
+            if count == 1:
+                feature['row'] = rows[first]
+            features.append(feature)
+        return features
+
+
+def build_cluster_pyramid(rows):
+    pyramid = ClusterPyramid()
+    pyramid.add_rows(rows)
+    return pyramid
+
+
+_pyramid = None
+_pyramid_lock = threading.Lock()
+
+
+def query_clusters(entry, zoom, bbox=WORLD_BBOX):
+    """
+    Query the shared pyramid for a DatasetEntry.
+
+    If the entry was produced by appending rows to the version the pyramid
+    was built from, only the new rows are added; otherwise it is rebuilt.
+    """
+    global _pyramid
+    with _pyramid_lock:
+        if _pyramid is None or _pyramid.digest != entry.digest:
+            if (_pyramid is not None and entry.base_digest == _pyramid.digest
+                    and entry.base_length == _pyramid.length):
+                _pyramid.add_rows(entry.rows, _pyramid.length)
+                print(f"Cluster pyramid extended to {_pyramid.length} rows")
+            else:
+                _pyramid = build_cluster_pyramid(entry.rows)
+                print(f"Cluster pyramid rebuilt for {_pyramid.length} rows")
+            _pyramid.digest = entry.digest
+        return _pyramid.query(entry.rows, zoom, bbox)
@@ -0,0 +1,120 @@
+# data/columnar.py
+import base64
+import json
+import struct
+from datetime import date, datetime
+
+import numpy as np
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Sentinel used for missing ints in the binary layout (JSON uses null instead)
+MISSING_INT = -1
+
+
+def to_epoch_days(date_str):
+    """Convert a 'YYYY/MM/DD' string to days since 1970-01-01, or None"""
+    if not date_str:
+        return None
+    try:
+        return datetime.strptime(date_str, '%Y/%m/%d').toordinal() - EPOCH_ORDINAL
+    except ValueError:
+        return None
+
+
+def to_int(value):
+    """Parse a cases/deaths cell ('-' and blanks become None)"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def build_columns(rows):
+    """
+    Turn parsed outbreak rows into one array per field.
+
+    Countries are dictionary-encoded into small ints, dates become epoch days
+    and coordinates are kept as a float32 array of interleaved lat/lon pairs
+    (NaN where the row had no coordinates).
+    """
+    countries = []
+    country_ids = {}
+    country_codes = []
+    locations = []
+    start_days = []
+    end_days = []
+    cases = []
+    deaths = []
+    coords = np.full(len(rows) * 2, np.nan, dtype='<f4')
+
+    for i, row in enumerate(rows):
+        country = row.get('country')
+        code = country_ids.get(country)
+        if code is None:
+            code = country_ids[country] = len(countries)
+            countries.append(country)
+        country_codes.append(code)
+        locations.append(row.get('location'))
+        start_days.append(to_epoch_days(row.get('start_date')))
+        end_days.append(to_epoch_days(row.get('end_date')))
+        cases.append(to_int(row.get('cases')))
+        deaths.append(to_int(row.get('deaths')))
+        if row.get('lat') is not None and row.get('lon') is not None:
+            coords[2 * i] = row['lat']
+            coords[2 * i + 1] = row['lon']
+
+    return {
+        'length': len(rows),
+        'countries': countries,
+        'country': country_codes,
+        'location': locations,
+        'start_date': start_days,
+        'end_date': end_days,
+        'cases': cases,
+        'deaths': deaths,
+        'coords': coords,
+    }
+
+
+def columns_to_json(columns):
+    """Serialize columns for ?format=columnar (coords as base64 float32)"""
+    payload = dict(columns)
+    payload['coords'] = base64.b64encode(columns['coords'].tobytes()).decode('ascii')
+    payload['coords_dtype'] = 'float32le'
+    return json.dumps(payload, separators=(',', ':'))
+
+
+def columns_to_binary(columns, version):
+    """
+    Serialize columns for ?format=binary.
+
+    Layout (little-endian):
+        uint32 header length, UTF-8 JSON header padded to 4 bytes,
+        int32 start_date[n], int32 end_date[n], int32 cases[n], int32 deaths[n],
+        float32 coords[2n], uint16 country[n]
+    Missing ints are -1 and missing coordinates are NaN.
+    """
+    n = columns['length']
+    header = json.dumps({
+        'version': version,
+        'length': n,
+        'countries': columns['countries'],
+        'location': columns['location'],
+        'missing_int': MISSING_INT,
+    }, separators=(',', ':')).encode('utf-8')
+    header += b' ' * (-len(header) % 4)
+
+    def int_block(values):
+        return np.array([MISSING_INT if v is None else v for v in values], dtype='<i4').tobytes()
+
+    return b''.join([
+        struct.pack('<I', len(header)),
+        header,
+        int_block(columns['start_date']),
+        int_block(columns['end_date']),
+        int_block(columns['cases']),
+        int_block(columns['deaths']),
+        columns['coords'].tobytes(),
+        np.asarray(columns['country'], dtype='<u2').tobytes(),
+    ])
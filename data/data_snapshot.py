@@ -0,0 +1,138 @@
+# data/data_snapshot.py
+import copy
+
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from data.input_tensors import InputTensorBank
+from data.period_panel import PeriodPanel
+from data.stats_cube import StatsCube
+
+
+class DataSnapshot:
+    """
+    One version of everything the predictor derives from the CSV: the raw
+    frame, the dense panels, the fitted scalers, the model input tensors
+    and the statistics cube.
+
+    A refresh builds a new snapshot to the side and the predictor publishes
+    it by replacing a single reference, so a request that reads
+    predictor.snapshot once works against one consistent version without
+    taking a lock. Treat a published snapshot as read-only.
+    """
+
+    def __init__(self, countries, input_shapes):
+        self.countries = list(countries)
+        self.country_ids = {country: i for i, country in enumerate(self.countries)}
+        self.input_shapes = input_shapes
+        # Stat and hash of the CSV this version was built from, and its short form
+        self.csv_state = None
+        self.version = None
+        self.raw_data = None
+        # Year range for the normalized year feature
+        self.min_year = 2000
+        self.max_year = 2023
+        # Dense country x period counts the model windows are cut from
+        self.weekly_panel = PeriodPanel('weekly', self.countries)
+        self.monthly_panel = PeriodPanel('monthly', self.countries)
+        self.cases_panel = PeriodPanel('monthly', self.countries)
+        self.deaths_panel = PeriodPanel('monthly', self.countries)
+        self.weekly_scaler = MinMaxScaler()
+        self.monthly_scaler = MinMaxScaler()
+        # Preallocated (n_countries, seq_len, 5) model inputs
+        self.weekly_inputs = InputTensorBank(self.countries, input_shapes['weekly'][0])
+        self.monthly_inputs = InputTensorBank(self.countries, input_shapes['monthly'][0])
+        self.stats = self.build_stats()
+
+    def successor(self):
+        """
+        A draft of the next version for appended rows: copies of the panels
+        to add to, the same raw frame (it is replaced, never modified) and
+        new scalers, inputs and statistics to be filled in
+        """
+        draft = DataSnapshot(self.countries, self.input_shapes)
+        draft.raw_data = self.raw_data
+        draft.min_year = self.min_year
+        draft.max_year = self.max_year
+        draft.weekly_panel = self.weekly_panel.copy()
+        draft.monthly_panel = self.monthly_panel.copy()
+        draft.cases_panel = self.cases_panel.copy()
+        draft.deaths_panel = self.deaths_panel.copy()
+        return draft
+
+    def with_csv_state(self, csv_state):
+        """The same version, recorded against a touched but unchanged CSV"""
+        touched = copy.copy(self)
+        touched.csv_state = csv_state
+        return touched
+
+    def complete(self, csv_state):
+        """Record the CSV this draft was built from and build its statistics; call before publishing"""
+        self.csv_state = csv_state
+        self.version = csv_state['digest'][:16]
+        self.stats = self.build_stats()
+
+    def panel(self, interval):
+        return self.weekly_panel if interval == 'weekly' else self.monthly_panel
+
+    def scaler(self, interval):
+        return self.weekly_scaler if interval == 'weekly' else self.monthly_scaler
+
+    def inputs(self, interval):
+        return self.weekly_inputs if interval == 'weekly' else self.monthly_inputs
+
+    def add_to_panels(self, df):
+        """Count the outbreaks (and sum the cases and deaths) of a cleaned frame into the panels"""
+        countries = df['country'].to_numpy()
+        dates = df['start_date'].to_numpy()
+        self.weekly_panel.add(countries, dates)
+        self.monthly_panel.add(countries, dates)
+        self.cases_panel.add(countries, dates, weights=df['cases'].to_numpy())
+        self.deaths_panel.add(countries, dates, weights=df['deaths'].to_numpy())
+
+    def build_stats(self):
+        """A StatsCube of the panels"""
+        return StatsCube(self.countries, {'weekly': self.weekly_panel, 'monthly': self.monthly_panel},
+                         self.cases_panel, self.deaths_panel, version=self.version)
+
+    def refresh_model_inputs(self, interval):
+        """
+        Fit the interval's scaler on its dense panel (zero periods included,
+        as in training) and write its input tensor from the panel's windows
+        """
+        panel = self.panel(interval)
+        scaler = self.scaler(interval)
+        seq_len, _ = self.input_shapes[interval]
+        if panel.n_periods < seq_len:
+            unit = 'weeks' if interval == 'weekly' else 'months'
+            print(f"Warning: only {panel.n_periods} {unit} of {interval} data, need {seq_len}. "
+                  f"Will use fallback methods.")
+        if panel.n_periods > 0:
+            scaler.fit(panel.counts.reshape(-1, 1).astype('float64'))
+        self.inputs(interval).refresh(panel, scaler)
+
+    def date_features(self, interval, target_date):
+        """The (year, month, week) features of a target date, as used in training"""
+        # Convert target_date to datetime if it's a string
+        if isinstance(target_date, str):
+            target_date = pd.to_datetime(target_date)
+
+        year = (target_date.year - self.min_year) / (self.max_year - self.min_year)
+        month = target_date.month / 12.0
+        if interval == 'weekly':
+            week = target_date.isocalendar().week / 52.0
+        else:
+            week = 0.5  # Default mid-month value
+        return year, month, week
+
+    def input_index(self, interval, country):
+        """Row of the country in the interval's InputTensorBank; raises if it cannot be predicted"""
+        if self.panel(interval).n_periods == 0:
+            raise ValueError(f"{interval.capitalize()} data not processed. Please load data first.")
+
+        index = self.country_ids.get(country)
+        if index is None or not self.inputs(interval).valid[index]:
+            seq_len, _ = self.input_shapes[interval]
+            unit = 'weeks' if interval == 'weekly' else 'months'
+            raise ValueError(f"Not enough data for {country}. Need outbreaks in at least {seq_len} {unit} of data.")
+        return index
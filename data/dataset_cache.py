@@ -0,0 +1,118 @@
+# data/dataset_cache.py
+import json
+import os
+import threading
+
+from data.metrics import DATASET_CACHE_REBUILDS
+from data.outbreak_table import load_outbreak_table
+
+DEFAULT_CSV_PATH = os.path.join('data', 'wahis_outbreak_details.csv')
+
+
+class DatasetEntry:
+    """One parsed version of the CSV. Treat as read-only: it is shared between requests."""
+
+    def __init__(self, rows, digest, mtime, size, base=None, rows_json=None, table=None):
+        self.rows = rows
+        # The typed OutbreakTable the rows were built from
+        self.table = table
+        self.digest = digest
+        self.mtime = mtime
+        self.size = size
+        self.version = digest[:16]
+        # Digest and row count of the version this one was appended to, if any
+        self.base_digest = base.digest if base is not None else None
+        self.base_length = len(base.rows) if base is not None else 0
+        # Serialized once per version so /api/data does not re-encode the rows
+        self.rows_json = rows_json if rows_json is not None else json.dumps(rows, separators=(',', ':'))
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+
+    def derive(self, name, builder):
+        """Build a value from this version once (e.g. an encoding or index) and reuse it"""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+        with self._derived_lock:
+            if name not in self._derived:
+                self._derived[name] = builder(self)
+            return self._derived[name]
+
+
+class DatasetCache:
+    """
+    In-process cache of the parsed outbreak CSV.
+
+    A cheap os.stat() check runs on every access. When the CSV's mtime or size
+    changed, the rows are rebuilt from its typed table (see outbreak_table),
+    which is compiled from the CSV only when its contents changed. When the
+    new version was appended to this one (the scraper appends), only the
+    new tail is turned into rows.
+    """
+
+    def __init__(self, csv_path=DEFAULT_CSV_PATH):
+        self.csv_path = csv_path
+        self._entry = None
+        self._stat_key = None
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        st = os.stat(self.csv_path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self):
+        """Return the current DatasetEntry, rebuilding it if the CSV changed"""
+        stat_key = self._stat()
+        entry = self._entry
+        if entry is not None and stat_key == self._stat_key:
+            return entry
+
+        with self._lock:
+            # Another thread may have rebuilt while we were waiting
+            stat_key = self._stat()
+            previous = self._entry
+            if previous is not None and stat_key == self._stat_key:
+                return previous
+
+            table = load_outbreak_table(self.csv_path)
+            # The state the table was compiled from, in case the file changed since the stat above
+            stat_key = (table.source['mtime_ns'], table.source['size'])
+            if previous is not None and table.digest == previous.digest:
+                # Touched but unchanged - keep the parsed rows
+                self._stat_key = stat_key
+                return previous
+
+            if (previous is not None and table.base is not None and table.base['digest'] == previous.digest
+                    and table.base['length'] == len(previous.rows)):
+                new_rows = table.rows(start=len(previous.rows))
+                rows = previous.rows + new_rows
+                rows_json = previous.rows_json
+                if new_rows:
+                    tail_json = json.dumps(new_rows, separators=(',', ':'))
+                    rows_json = tail_json if not previous.rows else rows_json[:-1] + ',' + tail_json[1:]
+                self._entry = DatasetEntry(rows, table.digest, stat_key[0] / 1e9, stat_key[1],
+                                           base=previous, rows_json=rows_json, table=table)
+                DATASET_CACHE_REBUILDS.inc('append')
+                print(f"Dataset cache appended {len(new_rows)} rows (version {self._entry.version})")
+            else:
+                rows = table.rows()
+                self._entry = DatasetEntry(rows, table.digest, stat_key[0] / 1e9, stat_key[1], table=table)
+                DATASET_CACHE_REBUILDS.inc('full')
+                print(f"Dataset cache rebuilt: {len(rows)} rows (version {self._entry.version})")
+            self._stat_key = stat_key
+            return self._entry
+
+    def invalidate(self):
+        """Drop the cached entry so the next access re-parses the CSV"""
+        with self._lock:
+            self._entry = None
+            self._stat_key = None
+
+
+dataset_cache = DatasetCache()
+
+
+def invalidate_dataset_cache():
+    """Manual invalidation hook, e.g. for the scraper after it appends rows"""
+    dataset_cache.invalidate()
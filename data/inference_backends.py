@@ -0,0 +1,172 @@
+# data/inference_backends.py
+#
+# Interchangeable ways of running a loaded model on a (batch, seq_len, 5)
+# float32 input. Keras' model.predict is built for large batches and sets up
+# a data pipeline on every call, which dominates single-sample latency; a
+# compiled tf.function or a TFLite interpreter runs one sample in a fraction
+# of that. Like keras_layers, this module imports TensorFlow and is only
+# imported by whoever loads the models.
+import os
+import threading
+
+import numpy as np
+import tensorflow as tf
+
+try:
+    # Standalone LiteRT runtime, tf.lite.Interpreter's replacement
+    from ai_edge_litert.interpreter import Interpreter
+except ImportError:
+    Interpreter = tf.lite.Interpreter
+
+BACKENDS = ('keras', 'compiled', 'tflite')
+DEFAULT_BACKEND = 'compiled'
+
+# TFLite files per model: float32, dynamic-range (int8 weights) and full int8
+# (int8 weights and activations, calibrated by quantize_models.py)
+MODEL_VARIANTS = ('float', 'dynamic', 'int8')
+
+
+def tflite_path(model_file, variant='float'):
+    """Where convert_models.py / quantize_models.py write a TFLite version of a .keras file"""
+    suffix = '.tflite' if variant == 'float' else f'.{variant}.tflite'
+    return os.path.splitext(model_file)[0] + suffix
+
+
+def unrolled_copy(model, custom_objects=None):
+    """
+    The same model with its LSTMs unrolled. TFLite's calibrator crashes on
+    the fused LSTM op, so full-int8 conversion starts from this graph.
+    """
+    config = model.get_config()
+    for layer in config['layers']:
+        if layer['class_name'] == 'LSTM':
+            layer['config']['unroll'] = True
+    copy = tf.keras.Model.from_config(config, custom_objects=custom_objects)
+    copy.set_weights(model.get_weights())
+    return copy
+
+
+def convert_to_tflite(model, input_shape, variant='float', representative_inputs=None, custom_objects=None):
+    """
+    Convert a loaded Keras model to TFLite bytes. The batch is fixed at one
+    so the LSTM lowers to the builtin fused op (a dynamic batch would need
+    the Select TF ops runtime). 'int8' needs representative_inputs, an
+    array of (seq_len, 5) samples used to calibrate activation ranges; the
+    model keeps float32 inputs and outputs either way.
+    """
+    if variant == 'int8':
+        if representative_inputs is None or len(representative_inputs) == 0:
+            raise ValueError("int8 conversion needs representative inputs")
+        model = unrolled_copy(model, custom_objects)
+    inputs = tf.keras.Input(input_shape, batch_size=1)
+    wrapper = tf.keras.Model(inputs, model(inputs))
+    converter = tf.lite.TFLiteConverter.from_keras_model(wrapper)
+    if variant in ('dynamic', 'int8'):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == 'int8':
+        def representative_dataset():
+            for sample in representative_inputs:
+                yield [np.asarray(sample, dtype='float32')[None]]
+        converter.representative_dataset = representative_dataset
+    return converter.convert()
+
+
+class KerasPredictBackend:
+    name = 'keras'
+
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, inputs):
+        return self.model.predict(inputs, verbose=0)
+
+
+class CompiledBackend:
+    """Calls the model directly inside a tf.function, traced once for any batch size"""
+    name = 'compiled'
+
+    def __init__(self, model, seq_len, n_features):
+        self.model = model
+        self._fn = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec([None, seq_len, n_features], tf.float32)]
+        )
+
+    def __call__(self, inputs):
+        return self._fn(tf.convert_to_tensor(inputs, dtype=tf.float32)).numpy()
+
+
+class TFLiteBackend:
+    """
+    Runs a .tflite file written by convert_models.py (or a quantized variant
+    from quantize_models.py). The converted graph
+    takes one sample, so a batch runs one invoke per sample. Interpreters are
+    not thread-safe, so each thread gets its own.
+    """
+    name = 'tflite'
+
+    def __init__(self, path, variant='float'):
+        self.path = path
+        self.variant = variant
+        if variant != 'float':
+            self.name = f'tflite-{variant}'
+        with open(path, 'rb') as f:
+            self.content = f.read()
+        self._local = threading.local()
+        # Fail now rather than on the first request if the file is unusable
+        self._interpreter()
+
+    def _interpreter(self):
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            interpreter = Interpreter(
+                model_content=self.content,
+                num_threads=int(os.environ.get('PREDICTOR_TF_THREADS', 1))
+            )
+            interpreter.allocate_tensors()
+            state = self._local.state = (
+                interpreter,
+                interpreter.get_input_details()[0]['index'],
+                interpreter.get_output_details()[0]['index'],
+            )
+        return state
+
+    def __call__(self, inputs):
+        interpreter, input_index, output_index = self._interpreter()
+        inputs = np.asarray(inputs, dtype='float32')
+        outputs = np.empty((len(inputs), 1), dtype='float32')
+        for i in range(len(inputs)):
+            interpreter.set_tensor(input_index, inputs[i:i + 1])
+            interpreter.invoke()
+            outputs[i] = interpreter.get_tensor(output_index).reshape(-1)[:1]
+        return outputs
+
+
+def make_backend(name, model, model_file, input_shape, variant='float'):
+    """
+    Build the named backend, falling back to 'compiled' and then 'keras' if
+    it cannot be set up. Quantized variants only exist as TFLite files, so
+    any variant but 'float' implies the tflite backend.
+    """
+    if variant not in MODEL_VARIANTS:
+        print(f"Unknown model variant {variant!r}, using float")
+        variant = 'float'
+    if variant != 'float':
+        name = 'tflite'
+    if name not in BACKENDS:
+        print(f"Unknown inference backend {name!r}, using {DEFAULT_BACKEND}")
+        name = DEFAULT_BACKEND
+    if name == 'tflite':
+        path = tflite_path(model_file, variant)
+        try:
+            return TFLiteBackend(path, variant)
+        except Exception as e:
+            script = 'convert_models.py' if variant == 'float' else 'quantize_models.py'
+            print(f"Could not load TFLite model {path} (run {script}): {e}. Using compiled backend")
+            name = 'compiled'
+    if name == 'compiled':
+        try:
+            return CompiledBackend(model, *input_shape)
+        except Exception as e:
+            print(f"Could not compile model {model_file}: {e}. Using keras backend")
+    return KerasPredictBackend(model)
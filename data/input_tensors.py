@@ -0,0 +1,58 @@
+# data/input_tensors.py
+import threading
+
+import numpy as np
+
+
+class InputTensorBank:
+    """
+    Ready-to-infer model inputs for every country.
+
+    One preallocated (n_countries, seq_len, 5) float32 array holds each
+    country's scaled window and country id (row i is country id i). It is
+    filled once per data snapshot and not modified after publication, so
+    reads take no lock. A request copies its row into a per-thread scratch
+    buffer and only fills in the three date features there, so concurrent
+    requests for different target dates never share memory and nothing is
+    allocated per request.
+    """
+
+    def __init__(self, countries, seq_len, n_features=5):
+        self.countries = list(countries)
+        self.seq_len = seq_len
+        self.tensor = np.zeros((len(self.countries), seq_len, n_features), dtype='float32')
+        self.tensor[:, :, 1] = np.arange(len(self.countries), dtype='float32')[:, None]
+        # Countries with outbreaks in a panel of at least seq_len periods, and a fitted scaler
+        self.valid = np.zeros(len(self.countries), dtype=bool)
+        self._local = threading.local()
+
+    def refresh(self, windows, scaler):
+        """Write the scaled windows from a PeriodPanel and a fitted MinMaxScaler, before publishing"""
+        fitted = hasattr(scaler, 'scale_')
+        for i, country in enumerate(self.countries):
+            window = windows.window(country, self.seq_len) if fitted else None
+            if window is None or not windows.row(country).any():
+                self.tensor[i, :, 0] = 0
+                self.valid[i] = False
+            else:
+                # Same arithmetic as MinMaxScaler.transform
+                self.tensor[i, :, 0] = window * scaler.scale_[0] + scaler.min_[0]
+                self.valid[i] = True
+
+    def sample(self, index, date_features):
+        """
+        The (1, seq_len, 5) input of one country. The array is this thread's
+        scratch buffer: use it before the thread's next call to sample().
+        """
+        scratch = getattr(self._local, 'scratch', None)
+        if scratch is None:
+            scratch = self._local.scratch = np.empty((1,) + self.tensor.shape[1:], dtype='float32')
+        scratch[0] = self.tensor[index]
+        scratch[0, :, 2:] = date_features
+        return scratch
+
+    def batch(self, indices, date_features):
+        """A new (len(indices), seq_len, 5) input with one row of date features per sample"""
+        inputs = self.tensor[indices]
+        inputs[:, :, 2:] = np.asarray(date_features, dtype='float32')[:, None, :]
+        return inputs
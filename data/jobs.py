@@ -0,0 +1,117 @@
+# data/jobs.py
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already queued or running"""
+
+
+class Job:
+    def __init__(self, job_id, description):
+        self.id = job_id
+        self.description = description
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+        self.future = None
+
+    def to_dict(self):
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'request': self.description,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if self.status == 'done':
+            data['result'] = self.result
+        elif self.status == 'failed':
+            data['error'] = self.error
+        return data
+
+
+class JobManager:
+    """
+    Runs prediction work on a background thread pool.
+
+    At most max_pending jobs may be queued or running at once; submit()
+    raises JobQueueFull beyond that. Queued jobs can be cancelled outright;
+    a running job is marked cancelled and its result is discarded when it
+    finishes. Finished jobs are kept for retention seconds so clients can
+    poll for them.
+    """
+
+    def __init__(self, max_workers=2, max_pending=32, retention=3600):
+        self.max_pending = max_pending
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prediction-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _pending(self):
+        return sum(1 for job in self._jobs.values() if job.status in ('queued', 'running'))
+
+    def _expire(self):
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at is not None and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def submit(self, fn, description=None):
+        """Queue fn() and return the job id"""
+        with self._lock:
+            self._expire()
+            if self._pending() >= self.max_pending:
+                raise JobQueueFull(f"Job queue is full ({self.max_pending} pending jobs)")
+            job = Job(uuid.uuid4().hex, description)
+            self._jobs[job.id] = job
+            job.future = self._executor.submit(self._run, job, fn)
+        return job.id
+
+    def _run(self, job, fn):
+        with self._lock:
+            if job.cancel_requested:
+                return
+            job.status = 'running'
+            job.started_at = time.time()
+        try:
+            result = fn()
+            error = None
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            result, error = None, str(e)
+        with self._lock:
+            job.finished_at = time.time()
+            if job.cancel_requested:
+                job.status = 'cancelled'
+            elif error is not None:
+                job.status, job.error = 'failed', error
+            else:
+                job.status, job.result = 'done', result
+
+    def get(self, job_id):
+        """Return a snapshot of the job as a dict, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job is not None else None
+
+    def cancel(self, job_id):
+        """Cancel a job; returns its new state, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status in ('queued', 'running'):
+                job.cancel_requested = True
+                if job.future.cancel() or job.status == 'queued':
+                    job.status = 'cancelled'
+                    job.finished_at = time.time()
+            return job.to_dict()
+
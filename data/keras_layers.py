@@ -0,0 +1,69 @@
+# data/keras_layers.py
+#
+# Everything that needs TensorFlow lives here so that importing
+# data.model_integration stays cheap; the predictor imports this module from
+# its background loader thread.
+import os
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+
+# Enable unsafe deserialization to allow loading models with Lambda layers
+tf.keras.config.enable_unsafe_deserialization()
+
+# Size TensorFlow's thread pools per process (see gunicorn.conf.py for multi-worker serving)
+if os.environ.get('PREDICTOR_TF_THREADS'):
+    tf.config.threading.set_intra_op_parallelism_threads(int(os.environ['PREDICTOR_TF_THREADS']))
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+# Create custom Lambda layer classes with proper TensorFlow imports
+@tf.keras.utils.register_keras_serializable()
+class OutbreakSequence(tf.keras.layers.Layer):
+    def __init__(self, **kwargs):
+        super(OutbreakSequence, self).__init__(**kwargs)
+        
+    def call(self, inputs):
+        # Extract the outbreak count feature (first feature)
+        return inputs[..., 0:1]
+    
+    def get_config(self):
+        return super(OutbreakSequence, self).get_config()
+    
+    def compute_output_shape(self, input_shape):
+        return (input_shape[0], input_shape[1], 1)
+
+@tf.keras.utils.register_keras_serializable()
+class CountrySequence(tf.keras.layers.Layer):
+    def __init__(self, **kwargs):
+        super(CountrySequence, self).__init__(**kwargs)
+        
+    def call(self, inputs):
+        # Extract the country ID feature (second feature) and cast to int32
+        return tf.cast(inputs[..., 1], dtype='int32')
+    
+    def get_config(self):
+        return super(CountrySequence, self).get_config()
+    
+    def compute_output_shape(self, input_shape):
+        return (input_shape[0], input_shape[1])
+
+@tf.keras.utils.register_keras_serializable()
+class DateSequence(tf.keras.layers.Layer):
+    def __init__(self, **kwargs):
+        super(DateSequence, self).__init__(**kwargs)
+        
+    def call(self, inputs):
+        # Extract the date features (from the 3rd feature onwards)
+        return inputs[..., 2:]
+    
+    def get_config(self):
+        return super(DateSequence, self).get_config()
+    
+    def compute_output_shape(self, input_shape):
+        return (input_shape[0], input_shape[1], input_shape[2] - 2)
+
+# Define custom objects for Lambda layers
+custom_objects = {
+    'OutbreakSequence': OutbreakSequence,
+    'CountrySequence': CountrySequence,
+    'DateSequence': DateSequence,
+}
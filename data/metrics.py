@@ -0,0 +1,181 @@
+# data/metrics.py
+#
+# Minimal in-process metrics rendered in the Prometheus text exposition format.
+# Each update is a dict lookup plus an add under a lock, so instrumenting the
+# request and prediction paths costs about a microsecond per update. Under a
+# multi-worker server every worker reports its own values; scrape each worker
+# (or aggregate by instance) rather than expecting one global count.
+import threading
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def set(self, value, *labelvalues):
+        """Mirror a value counted elsewhere (e.g. a cache's own hit counter)"""
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            for labelvalues, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}')
+        return lines
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, *labelvalues, amount=1):
+        self.inc(*labelvalues, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labelvalues)
+            if series is None:
+                # Per-bucket counts (not cumulative) plus an overflow slot, then the sum
+                series = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            for labelvalues, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    labels = _format_labels(self.labelnames, labelvalues, ('le', _format_value(bound)))
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                labels = _format_labels(self.labelnames, labelvalues)
+                lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+                lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector):
+        """Register a callable run at scrape time to refresh gauges (e.g. cache stats)"""
+        self._collectors.append(collector)
+
+    def render(self):
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Time spent handling a request, per route',
+    ('route', 'method'))
+REQUESTS = registry.counter(
+    'http_requests_total', 'Requests handled, per route and status code',
+    ('route', 'method', 'status'))
+REQUESTS_IN_FLIGHT = registry.gauge(
+    'http_requests_in_flight', 'Requests currently being handled')
+
+PREDICT_LATENCY = registry.histogram(
+    'outbreak_predict_duration_seconds', 'Total OutbreakPredictor.predict time, including the data refresh',
+    ('interval',))
+INFERENCE_LATENCY = registry.histogram(
+    'outbreak_inference_duration_seconds', 'Time to produce a value via the model or fallback_prediction',
+    ('interval', 'path'))
+DATA_RELOADS = registry.counter(
+    'outbreak_data_reloads_total', 'Predictor CSV reloads (full prepare_data or appended rows)',
+    ('result',))
+DATA_RELOAD_LATENCY = registry.histogram(
+    'outbreak_data_reload_duration_seconds', 'Time spent reloading the predictor data')
+DATASET_CACHE_REBUILDS = registry.counter(
+    'dataset_cache_rebuilds_total', 'Dataset cache rebuilds by kind (full parse or appended tail)',
+    ('kind',))
+PREDICTION_CACHE_HITS = registry.counter(
+    'prediction_cache_hits_total', 'Prediction cache lookups that found a result')
+PREDICTION_CACHE_MISSES = registry.counter(
+    'prediction_cache_misses_total', 'Prediction cache lookups that had to run the predictor')
+PREDICTION_CACHE_EVICTIONS = registry.counter(
+    'prediction_cache_evictions_total', 'Prediction cache entries dropped by LRU or TTL')
+PREDICTION_CACHE_ENTRIES = registry.gauge(
+    'prediction_cache_entries', 'Prediction cache entries currently held')
+PREDICTION_CACHE_HIT_RATIO = registry.gauge(
+    'prediction_cache_hit_ratio', 'Prediction cache hits / lookups since start')
+PREDICTIONS_COALESCED = registry.counter(
+    'prediction_coalesced_total', 'Predictions that waited on an identical in-flight computation')
+PREDICTOR_MEMO_HITS = registry.counter(
+    'predictor_memo_hits_total', 'OutbreakPredictor results served from its data-versioned memo')
+PREDICTOR_MEMO_MISSES = registry.counter(
+    'predictor_memo_misses_total', 'OutbreakPredictor results that had to be computed')
+PREDICTOR_MEMO_ENTRIES = registry.gauge(
+    'predictor_memo_entries', 'Results held in the OutbreakPredictor memo')
+PREDICTOR_MEMO_BYTES = registry.gauge(
+    'predictor_memo_bytes', 'Approximate size of the results held in the OutbreakPredictor memo')
@@ -3,88 +3,75 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
-from tensorflow.keras.models import load_model
-from sklearn.preprocessing import MinMaxScaler, LabelEncoder
+import sys
+import time
+from sklearn.preprocessing import LabelEncoder
 import pickle
-import tensorflow as tf
-from tensorflow.keras import backend as K
+import threading
 import warnings
 from sklearn.exceptions import DataConversionWarning
+from data.data_snapshot import DataSnapshot
+from data.outbreak_table import load_outbreak_table
+from data.prediction_cache import PredictionCache
+from data.metrics import PREDICT_LATENCY, INFERENCE_LATENCY, DATA_RELOADS, DATA_RELOAD_LATENCY
 
 # Suppress sklearn warnings about feature names
 warnings.filterwarnings("ignore", category=DataConversionWarning)
 warnings.filterwarnings("ignore", category=UserWarning, module="sklearn")
 
-# Enable unsafe deserialization to allow loading models with Lambda layers
-tf.keras.config.enable_unsafe_deserialization()
+CSV_PATH = 'data/wahis_outbreak_details.csv'
 
-# Create custom Lambda layer classes with proper TensorFlow imports
-@tf.keras.utils.register_keras_serializable()
-class OutbreakSequence(tf.keras.layers.Layer):
-    def __init__(self, **kwargs):
-        super(OutbreakSequence, self).__init__(**kwargs)
-        
-    def call(self, inputs):
-        # Extract the outbreak count feature (first feature)
-        return inputs[..., 0:1]
-    
-    def get_config(self):
-        return super(OutbreakSequence, self).get_config()
-    
-    def compute_output_shape(self, input_shape):
-        return (input_shape[0], input_shape[1], 1)
+# Expected (timesteps, features) of each model's input
+INPUT_SHAPES = {
+    'weekly': (24, 5),
+    'monthly': (12, 5),
+}
 
-@tf.keras.utils.register_keras_serializable()
-class CountrySequence(tf.keras.layers.Layer):
-    def __init__(self, **kwargs):
-        super(CountrySequence, self).__init__(**kwargs)
-        
-    def call(self, inputs):
-        # Extract the country ID feature (second feature) and cast to int32
-        return tf.cast(inputs[..., 1], dtype='int32')
-    
-    def get_config(self):
-        return super(CountrySequence, self).get_config()
-    
-    def compute_output_shape(self, input_shape):
-        return (input_shape[0], input_shape[1])
+MODEL_FILES = {
+    'weekly': 'models/global_weekly_model.keras',
+    'monthly': 'models/global_monthly_model.keras',
+}
 
-@tf.keras.utils.register_keras_serializable()
-class DateSequence(tf.keras.layers.Layer):
-    def __init__(self, **kwargs):
-        super(DateSequence, self).__init__(**kwargs)
-        
-    def call(self, inputs):
-        # Extract the date features (from the 3rd feature onwards)
-        return inputs[..., 2:]
-    
-    def get_config(self):
-        return super(DateSequence, self).get_config()
-    
-    def compute_output_shape(self, input_shape):
-        return (input_shape[0], input_shape[1], input_shape[2] - 2)
+# How loaded models are run: 'compiled' (tf.function), 'keras' (model.predict)
+# or 'tflite' (needs the files written by convert_models.py)
+INFERENCE_BACKEND = os.environ.get('PREDICTOR_BACKEND', 'compiled')
+# 'float', or a quantized TFLite variant from quantize_models.py ('dynamic', 'int8')
+MODEL_VARIANT = os.environ.get('PREDICTOR_MODEL_VARIANT', 'float')
 
-# Define custom objects for Lambda layers
-custom_objects = {
-    'OutbreakSequence': OutbreakSequence,
-    'CountrySequence': CountrySequence,
-    'DateSequence': DateSequence,
-}
+
+def result_size(value):
+    """Approximate bytes held by a memoized result: an int, a list of ints or a dict of those"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + result_size(v) for k, v in value.items())
+    if isinstance(value, list):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+    return sys.getsizeof(value)
 
 class OutbreakPredictor:
     def __init__(self):
         self.weekly_model = None
         self.monthly_model = None
-        self.weekly_scaler = MinMaxScaler()
-        self.monthly_scaler = MinMaxScaler()
-        self.raw_data = None
-        self.weekly_data = None
-        self.monthly_data = None
-        self.annual_data = None
-        self.weekly_processed = None
-        self.monthly_processed = None
-        self.annual_processed = None
+        # Callables running a loaded model on a (batch, seq_len, 5) input, see data/inference_backends.py
+        self.weekly_backend = None
+        self.monthly_backend = None
         self.models_loaded = False
+        # Set once the background loader has finished (successfully or in fallback mode)
+        self.ready = threading.Event()
+        self.warmed = False
+        self.load_error = None
+        # Held while a new data snapshot is built; requests never wait for it
+        self._refresh_lock = threading.RLock()
+        self._refresh_thread = None
+        self._refresh_thread_lock = threading.Lock()
+        # Results of predict and the forecast methods, keyed with the data and model versions
+        # they were computed from; cleared whenever either changes
+        self.model_version = 0
+        self.memo = PredictionCache(
+            max_entries=int(os.environ.get('PREDICTOR_MEMO_SIZE', 4096)),
+            ttl=24 * 3600,
+            max_bytes=int(os.environ.get('PREDICTOR_MEMO_BYTES', 8 * 2 ** 20)),
+            sizeof=result_size
+        )
         self.model_metadata = {}
         self.country_encoder = LabelEncoder()
         
@@ -101,45 +88,15 @@ class OutbreakPredictor:
             'United States of America', 'Uruguay'
         ]
         self.country_encoder.fit(self.countries_48)
-        
-        # Store min and max years for normalization
-        self.min_year = 2000
-        self.max_year = 2023
+        # Everything derived from the CSV (frames, panels, scalers, model inputs,
+        # statistics) as one read-only version. Refreshes build a new snapshot and
+        # swap this reference; read it once per request and use that object throughout.
+        self.snapshot = DataSnapshot(self.country_encoder.classes_, INPUT_SHAPES)
         
     def load_models(self):
         """Load pre-trained models and prepare data"""
         try:
-            # Check if model files exist
-            model_files = {
-                'weekly': 'models/global_weekly_model.keras',
-                'monthly': 'models/global_monthly_model.keras'
-            }
-            
-            # Load available models
-            for model_type, model_file in model_files.items():
-                if os.path.exists(model_file):
-                    try:
-                        # Try to load with custom objects
-                        model = load_model(
-                            model_file, 
-                            custom_objects=custom_objects,
-                            compile=False
-                        )
-                        setattr(self, f"{model_type}_model", model)
-                        print(f"Loaded {model_type} model with custom objects")
-                    except Exception as e:
-                        print(f"Error loading {model_type} model with custom objects: {e}")
-                        # Try loading without custom objects as fallback
-                        try:
-                            model = load_model(model_file, compile=False)
-                            setattr(self, f"{model_type}_model", model)
-                            print(f"Loaded {model_type} model without custom objects")
-                        except Exception as e2:
-                            print(f"Error loading {model_type} model without custom objects: {e2}")
-                            setattr(self, f"{model_type}_model", None)
-                else:
-                    print(f"Warning: Model file not found: {model_file}")
-                    setattr(self, f"{model_type}_model", None)
+            self.load_model_files()
             
             # Prepare data
             self.prepare_data()
@@ -159,6 +116,95 @@ class OutbreakPredictor:
             self.models_loaded = True  # Still mark as loaded to use fallback
             return True
     
+    def load_model_files(self):
+        """Load the weekly and monthly .keras files (None for any that fail)"""
+        # Imported here so that TensorFlow is only loaded by whoever loads the models
+        from data.keras_layers import custom_objects, load_model
+        from data.inference_backends import make_backend
+        
+        # Load available models
+        for model_type, model_file in MODEL_FILES.items():
+            if os.path.exists(model_file):
+                try:
+                    # Try to load with custom objects
+                    model = load_model(
+                        model_file, 
+                        custom_objects=custom_objects,
+                        compile=False
+                    )
+                    setattr(self, f"{model_type}_model", model)
+                    print(f"Loaded {model_type} model with custom objects")
+                except Exception as e:
+                    print(f"Error loading {model_type} model with custom objects: {e}")
+                    # Try loading without custom objects as fallback
+                    try:
+                        model = load_model(model_file, compile=False)
+                        setattr(self, f"{model_type}_model", model)
+                        print(f"Loaded {model_type} model without custom objects")
+                    except Exception as e2:
+                        print(f"Error loading {model_type} model without custom objects: {e2}")
+                        setattr(self, f"{model_type}_model", None)
+            else:
+                print(f"Warning: Model file not found: {model_file}")
+                setattr(self, f"{model_type}_model", None)
+            
+            model = getattr(self, f"{model_type}_model")
+            backend = None
+            if model is not None:
+                backend = make_backend(INFERENCE_BACKEND, model, model_file, INPUT_SHAPES[model_type], MODEL_VARIANT)
+                print(f"Running {model_type} model with the {backend.name} backend")
+            setattr(self, f"{model_type}_backend", backend)
+        
+        # Results of the previous models must not be served for the new ones
+        self.model_version += 1
+        self.memo.clear()
+    
+    def publish(self, snapshot):
+        """
+        Make a completed snapshot the one requests read. This is a single
+        reference assignment, so a reader sees the old or the new version,
+        never a mix; results memoized for the old version are dropped.
+        """
+        previous = self.snapshot
+        self.snapshot = snapshot
+        if snapshot.version != previous.version:
+            self.memo.clear()
+    
+    def period_key(self, snapshot, interval, target_date):
+        """The target date as the models see it: its date features (None if there are none)"""
+        if interval not in INPUT_SHAPES or target_date is None:
+            return None
+        return snapshot.date_features(interval, target_date)
+    
+    def memoized(self, snapshot, key, compute):
+        """
+        Return compute() for key under the snapshot's data version and the
+        current model version, reusing an earlier result. Results are shared:
+        treat them as read-only.
+        """
+        key = key + (snapshot.version, self.model_version)
+        result = self.memo.get(key)
+        if result is None:
+            result = compute()
+            self.memo.put(key, result)
+        return result
+    
+    def backend(self, interval):
+        """The interval's inference backend, or None when it has no loaded model"""
+        return getattr(self, f"{interval}_backend") if interval in INPUT_SHAPES else None
+    
+    def current_snapshot(self):
+        """
+        The snapshot a request should use throughout: the published one, after
+        starting a background refresh if the CSV changed
+        """
+        self.request_refresh()
+        return self.snapshot
+    
+    def infer(self, interval, inputs):
+        """Run the interval's model on a (batch, seq_len, 5) input, returning (batch, 1) scaled values"""
+        return self.backend(interval)(inputs)
+    
     def load_models_with_fallback(self):
         """Try to load models with fallback to simple averaging"""
         try:
@@ -169,31 +215,178 @@ class OutbreakPredictor:
             self.prepare_data()  # Still prepare data for fallback predictions
             return True
     
-    def refresh_data(self):
-        """Refresh data from the CSV file"""
+    def warm_up(self):
+        """Run one dummy forward pass per model so the first request does not pay for graph tracing"""
+        for model_type, shape in INPUT_SHAPES.items():
+            if self.backend(model_type) is not None:
+                self.infer(model_type, np.zeros((1,) + shape, dtype='float32'))
+                print(f"Warmed up {model_type} model")
+        self.warmed = True
+    
+    def start_background_load(self, prepare_data=True):
+        """
+        Load (and optionally prepare data for) the models on a daemon thread,
+        then warm them up; self.ready is set when done.
+        """
+        thread = threading.Thread(
+            target=self.load_and_warm, args=(prepare_data,),
+            name='model-loader', daemon=True
+        )
+        thread.start()
+        return thread
+    
+    def load_and_warm(self, prepare_data=True):
+        """
+        Load (and optionally prepare data for) the models and warm them up in
+        the calling thread; self.ready is set when done, also on failure.
+        """
         try:
-            self.prepare_data()
-            print("Data refreshed successfully")
-            return True
+            if prepare_data:
+                self.load_models_with_fallback()
+                
+                # Check which countries have data issues
+                self.check_country_data_availability()
+            else:
+                self.load_model_files()
+                self.models_loaded = True
+            self.warm_up()
         except Exception as e:
-            print(f"Error refreshing data: {e}")
+            print(f"Error loading models: {e}. Fallback predictions will be used.")
+            self.load_error = str(e)
+            self.models_loaded = True  # Still mark as loaded to use fallback
+        finally:
+            self.ready.set()
+    
+    def data_prepared(self):
+        """True when at least one interval's panel has periods to predict from"""
+        snapshot = self.snapshot
+        return any(snapshot.panel(interval).n_periods > 0 for interval in INPUT_SHAPES)
+    
+    def readiness(self):
+        """Describe the loading state for the /readyz endpoint"""
+        models = {
+            model_type: getattr(self, f"{model_type}_model") is not None
+            for model_type in INPUT_SHAPES
+        }
+        return {
+            'ready': self.ready.is_set() and self.data_prepared(),
+            'loading': not self.ready.is_set(),
+            'models': models,
+            'backends': {
+                model_type: getattr(self.backend(model_type), 'name', None)
+                for model_type in INPUT_SHAPES
+            },
+            'warmed': self.warmed,
+            'data_prepared': self.data_prepared(),
+            'fallback_only': self.ready.is_set() and not any(models.values()),
+            'error': self.load_error,
+        }
+    
+    def csv_changed(self, snapshot):
+        """True unless the CSV's mtime and size are those the snapshot was built from"""
+        if snapshot.csv_state is None:
+            return True
+        st = os.stat(CSV_PATH)
+        return (st.st_mtime_ns, st.st_size) != (snapshot.csv_state['mtime_ns'], snapshot.csv_state['size'])
+    
+    def request_refresh(self):
+        """
+        Called on the request path instead of refresh_data: a stat() of the
+        CSV and, if it changed, a refresh started on a background thread.
+        The request carries on with the current snapshot; later requests get
+        the new one once it is published.
+        """
+        try:
+            if not self.csv_changed(self.snapshot):
+                return
+        except OSError:
+            return
+        with self._refresh_thread_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=self.refresh_data, name='data-refresh', daemon=True)
+            self._refresh_thread.start()
+    
+    def refresh_data(self):
+        """
+        Bring the snapshot up to date with the CSV file, waiting for any
+        refresh already running. Nothing is re-read while the file's mtime
+        and size are unchanged; when rows were only appended, just the new
+        tail is added to a copy of the current version.
+        """
+        with self._refresh_lock:
+            try:
+                snapshot = self.snapshot
+                if snapshot.csv_state is not None:
+                    if not self.csv_changed(snapshot):
+                        return True
+                    if self.ingest_appended_rows(snapshot):
+                        return True
+                self.prepare_data()
+                print("Data refreshed successfully")
+                return True
+            except Exception as e:
+                print(f"Error refreshing data: {e}")
+                return False
+    
+    def ingest_appended_rows(self, snapshot):
+        """
+        Publish the snapshot plus the rows appended to the CSV since it was
+        built. Returns False when the file changed in any other way and needs
+        a full reload.
+        """
+        start = time.perf_counter()
+        table = load_outbreak_table(CSV_PATH)
+        state = table.source
+        if state['digest'] == snapshot.csv_state['digest']:
+            # Touched but unchanged
+            self.publish(snapshot.with_csv_state(state))
+            return True
+        
+        if (table.base is None or table.base['digest'] != snapshot.csv_state['digest']
+                or table.base['length'] != len(snapshot.raw_data)):
             return False
+        
+        draft = snapshot.successor()
+        tail = table.frame(start=table.base['length'])
+        draft.raw_data = pd.concat([snapshot.raw_data, tail], ignore_index=True)
+        
+        tail = tail[tail['country'].isin(self.countries_48)]
+        if len(tail) > 0 and tail['start_date'].notna().any():
+            draft.min_year = min(draft.min_year, tail['start_date'].dt.year.min())
+            draft.max_year = max(draft.max_year, tail['start_date'].dt.year.max())
+        
+        # Only the tail's rows are counted into the copied panels
+        draft.add_to_panels(tail)
+        for interval in INPUT_SHAPES:
+            draft.refresh_model_inputs(interval)
+        draft.complete(state)
+        self.publish(draft)
+        
+        DATA_RELOADS.inc('appended')
+        DATA_RELOAD_LATENCY.observe(time.perf_counter() - start)
+        print(f"Data refreshed incrementally: {len(tail)} new rows")
+        return True
     
     def check_country_data_availability(self):
         """Check which countries have sufficient data for prediction"""
         problematic_countries = []
         
-        if self.weekly_processed is not None:
-            for country in self.countries_48:
-                country_data = self.weekly_processed[self.weekly_processed['country'] == country]
-                if len(country_data) < 24:
-                    problematic_countries.append(f"Weekly: {country} - only {len(country_data)} records")
-        
-        if self.monthly_processed is not None:
+        # Windows come from the dense panels: every country has one once the panel
+        # spans seq_len periods, but a window without outbreaks carries little signal
+        stats = self.snapshot.stats
+        for interval, unit in (('weekly', 'weeks'), ('monthly', 'months')):
+            seq_len, _ = INPUT_SHAPES[interval]
+            n_periods = stats.n_periods(interval)
+            if n_periods < seq_len:
+                problematic_countries.append(
+                    f"{interval.capitalize()}: only {n_periods} {unit} of data, need {seq_len}")
+                continue
             for country in self.countries_48:
-                country_data = self.monthly_processed[self.monthly_processed['country'] == country]
-                if len(country_data) < 12:
-                    problematic_countries.append(f"Monthly: {country} - only {len(country_data)} records")
+                since = stats.periods_since_outbreak(interval, country)
+                if since is None or since >= seq_len:
+                    problematic_countries.append(
+                        f"{interval.capitalize()}: {country} - no outbreaks in the last {seq_len} {unit}")
         
         if problematic_countries:
             print("Countries with insufficient data:")
@@ -204,378 +397,413 @@ class OutbreakPredictor:
         
         return problematic_countries
     
-    def predict_for_all_countries(self, interval, target_date):
-        """Make predictions for all countries and aggregate results using averages"""
+    def predict_for_all_countries(self, interval, target_date, snapshot=None):
+        """Predict every country and return the total across countries"""
         try:
-            # Refresh data to get the latest information
-            self.refresh_data()
-            
-            if interval == 'weekly' and self.weekly_processed is not None and len(self.weekly_processed) > 0:
-                return max(1, round(self.weekly_processed['outbreak_count'].mean()))
-            elif interval == 'monthly' and self.monthly_processed is not None and len(self.monthly_processed) > 0:
-                return max(1, round(self.monthly_processed['outbreak_count'].mean()))
-            else:
-                return 1  # Default fallback value
+            if interval not in INPUT_SHAPES:
+                return self.fallback_prediction(interval, 'all', snapshot)
+            return self.aggregate_forecasts(interval, self.forecast_all_countries(interval, target_date, snapshot))
         except Exception as e:
             print(f"Error in predict_for_all_countries: {e}")
             return 1  # Default fallback value
     
-    def predict(self, country, interval, target_date=None):
+    def aggregate_forecasts(self, interval, forecasts, snapshot=None):
+        """
+        Total predicted outbreaks across the countries of forecast_all_countries.
+        Intervals without a model get the single all-countries fallback instead.
+        """
+        if interval not in INPUT_SHAPES:
+            return self.fallback_prediction(interval, 'all', snapshot)
+        return max(1, sum(forecasts.values()))
+    
+    def forecast_all_countries(self, interval, target_date=None, snapshot=None):
+        """
+        Forecast every country in countries_48 with one batched (48, seq_len, 5)
+        forward pass. Countries the model cannot serve (too little data, no
+        model) get their fallback_value, which is not floored at 1 so the values
+        add up to a total. Returns {country: predicted outbreaks}.
+        """
+        if snapshot is None:
+            snapshot = self.current_snapshot()
+        
+        target_date = self.normalize_target_date(interval, target_date)
+        return self.memoized(
+            snapshot, ('all-countries', interval, self.period_key(snapshot, interval, target_date)),
+            lambda: self._forecast_all_countries(snapshot, interval, target_date)
+        )
+    
+    def _forecast_all_countries(self, snapshot, interval, target_date):
+        forecasts = {}
+        if self.backend(interval) is not None:
+            inputs, scaler = snapshot.inputs(interval), snapshot.scaler(interval)
+            try:
+                indices = np.flatnonzero(inputs.valid)
+                if len(indices) > 0:
+                    start = time.perf_counter()
+                    features = [snapshot.date_features(interval, target_date)] * len(indices)
+                    scaled_predictions = self.infer(interval, inputs.batch(indices, features))
+                    actual_predictions = scaler.inverse_transform(scaled_predictions.reshape(-1, 1))
+                    INFERENCE_LATENCY.observe(time.perf_counter() - start, interval, 'batch')
+                    for index, value in zip(indices.tolist(), actual_predictions[:, 0]):
+                        forecasts[inputs.countries[index]] = max(0, round(float(value)))
+            except Exception as e:
+                print(f"All-countries {interval} prediction failed, using fallback: {e}")
+                forecasts = {}
+        
+        return {
+            country: forecasts[country] if country in forecasts
+            else self.fallback_value(interval, country, snapshot)
+            for country in self.countries_48
+        }
+    
+    def predict(self, country, interval, target_date=None, horizon=None):
         """
-        Main prediction method that routes to the appropriate specific prediction method
+        Main prediction method that routes to the appropriate specific prediction method.
+        With a horizon, returns the predicted outbreaks of that many consecutive periods.
         """
+        if horizon is not None:
+            return self.predict_horizon(country, interval, target_date, horizon)
+        
+        start = time.perf_counter()
+        snapshot = self.current_snapshot()
         try:
-            # Refresh data to get the latest information
-            self.refresh_data()
+            target_date = self.normalize_target_date(interval, target_date)
             
             # Handle "all" countries case
             if country == 'all':
-                return self.predict_for_all_countries(interval, target_date)
-            
-            # Set default target date if not provided
-            if target_date is None:
-                if interval == 'weekly':
-                    target_date = datetime.now() + timedelta(days=7)
-                elif interval == 'monthly':
-                    target_date = datetime.now() + timedelta(days=30)
-            
-            # Convert target_date to proper format if it's a string
-            if isinstance(target_date, str):
-                if interval == 'weekly':
-                    target_date = pd.to_datetime(target_date)
-                elif interval == 'monthly':
-                    # For monthly, ensure we have the first day of the month
-                    target_date = pd.to_datetime(target_date + '-01' if len(target_date) == 7 else target_date)
+                return self.predict_for_all_countries(interval, target_date, snapshot)
             
             # Convert interval to match the method names for single country predictions
             if interval == 'weekly':
-                return self.predict_weekly(target_date, country)
+                compute = lambda: self.predict_weekly(snapshot, target_date, country)
             elif interval == 'monthly':
-                return self.predict_monthly(target_date, country)
+                compute = lambda: self.predict_monthly(snapshot, target_date, country)
             else:
                 raise ValueError(f"Invalid interval: {interval}")
+            
+            # Repeated queries against the same data and models skip pandas and the model
+            key = ('predict', country, interval, self.period_key(snapshot, interval, target_date))
+            return self.memoized(snapshot, key, compute)
         except Exception as e:
             print(f"Error in predict method: {e}")
             # Fallback: use simple average of recent data
-            return self.fallback_prediction(interval, country)
+            return self.fallback_prediction(interval, country, snapshot)
+        finally:
+            PREDICT_LATENCY.observe(time.perf_counter() - start, interval)
     
-    def fallback_prediction(self, interval, country):
-        """Fallback prediction using simple averaging"""
+    def predict_horizon(self, country, interval, target_date, horizon):
+        """The next horizon periods for one country, or their per-period totals for 'all'"""
+        start = time.perf_counter()
         try:
-            if interval == 'weekly' and self.weekly_processed is not None and len(self.weekly_processed) > 0:
-                if country == 'all':
-                    avg_outbreaks = self.weekly_processed['outbreak_count'].mean()
-                else:
-                    country_data = self.weekly_processed[self.weekly_processed['country'] == country]
-                    if len(country_data) > 0:
-                        avg_outbreaks = country_data['outbreak_count'].mean()
-                    else:
-                        avg_outbreaks = 0
-                return max(1, round(avg_outbreaks))
-            elif interval == 'monthly' and self.monthly_processed is not None and len(self.monthly_processed) > 0:
-                if country == 'all':
-                    avg_outbreaks = self.monthly_processed['outbreak_count'].mean()
-                else:
-                    country_data = self.monthly_processed[self.monthly_processed['country'] == country]
-                    if len(country_data) > 0:
-                        avg_outbreaks = country_data['outbreak_count'].mean()
-                    else:
-                        avg_outbreaks = 0
-                return max(1, round(avg_outbreaks))
-            else:
-                return 1  # Default fallback value
-        except Exception as e:
-            print(f"Error in fallback prediction: {e}")
-            return 1  # Default fallback value
+            if interval not in INPUT_SHAPES:
+                # No model to roll forward: the single fallback for every period
+                return [self.fallback_prediction(interval, country)] * horizon
+            if country == 'all':
+                return self.aggregate_trajectories(
+                    interval, self.forecast_horizon(self.countries_48, interval, horizon, target_date))
+            return self.forecast_horizon([country], interval, horizon, target_date)[country]
+        finally:
+            PREDICT_LATENCY.observe(time.perf_counter() - start, interval)
     
-    def prepare_data(self):
-        """Prepare the data for prediction by loading and processing the CSV"""
-        try:
-            # Check if data file exists
-            csv_path = 'data/wahis_outbreak_details.csv'
-            if not os.path.exists(csv_path):
-                raise FileNotFoundError(f"Data file not found: {csv_path}")
-                
-            # Load the original data
-            df = pd.read_csv(csv_path)
-            self.raw_data = df  # Store raw data for potential future use
-            
-            # Convert dates and handle missing values
-            df['start_date'] = pd.to_datetime(df['start_date'], format='%Y/%m/%d', errors='coerce')
-            df['end_date'] = pd.to_datetime(df['end_date'], format='%Y/%m/%d', errors='coerce')
-            df['cases'] = pd.to_numeric(df['cases'], errors='coerce').fillna(0)
-            df['deaths'] = pd.to_numeric(df['deaths'], errors='coerce').fillna(0)
-            
-            # Check if we have enough data
-            if len(df) < 10:
-                raise ValueError("Not enough data for prediction. Need at least 10 records.")
-            
-            # Filter to only include the 48 countries used in training
-            df = df[df['country'].isin(self.countries_48)]
-            
-            # Update min and max years based on actual data
-            if len(df) > 0:
-                self.min_year = df['start_date'].dt.year.min()
-                self.max_year = df['start_date'].dt.year.max()
-            
-            # Create time period columns
-            df['Year'] = df['start_date'].dt.year
-            df['Month'] = df['start_date'].dt.to_period('M')
-            df['Week'] = df['start_date'].dt.to_period('W')
-            
-            # Weekly aggregation
-            weekly_df = df.groupby(['Week', 'country'], observed=True).agg(
-                outbreak_count=('start_date', 'count')
-            ).reset_index()
-            
-            # Monthly aggregation
-            monthly_df = df.groupby(['Month', 'country'], observed=True).agg(
-                outbreak_count=('start_date', 'count')
-            ).reset_index()
-            
-            # Store the data
-            self.weekly_data = weekly_df
-            self.monthly_data = monthly_df
-            
-            # Create features and fit scalers
-            self.prepare_weekly_features()
-            self.prepare_monthly_features()
-            
-            print("Data prepared for prediction")
-        except Exception as e:
-            print(f"Error preparing data: {e}")
-            # Create empty dataframes as fallback
-            self.weekly_processed = pd.DataFrame()
-            self.monthly_processed = pd.DataFrame()
+    def aggregate_trajectories(self, interval, trajectories, snapshot=None):
+        """
+        Per-period totals across the countries of forecast_horizon. Intervals
+        without a model get the single all-countries fallback for every period.
+        """
+        if interval not in INPUT_SHAPES:
+            horizon = len(next(iter(trajectories.values()), []))
+            return [self.fallback_prediction(interval, 'all', snapshot)] * horizon
+        return [max(1, sum(step)) for step in zip(*trajectories.values())]
+    
+    def horizon_dates(self, interval, target_date, horizon):
+        """Start of each forecast period, beginning at target_date"""
+        target_date = pd.Timestamp(target_date)
+        if interval == 'weekly':
+            return [target_date + pd.Timedelta(weeks=step) for step in range(horizon)]
+        return [target_date + pd.DateOffset(months=step) for step in range(horizon)]
+    
+    def forecast_horizon(self, countries, interval, horizon, target_date=None, snapshot=None):
+        """
+        Roll the model forward horizon periods for several countries at once.
+        Each step is one batched forward pass over all the countries; each
+        prediction is then shifted into its country's window for the next
+        step, so N steps cost N model calls whatever the number of countries.
+        Countries the model cannot serve repeat their fallback value.
+        Returns {country: [predicted outbreaks per period]}.
+        """
+        if horizon < 1:
+            raise ValueError(f"Invalid horizon: {horizon}")
+        
+        if snapshot is None:
+            snapshot = self.current_snapshot()
+        
+        target_date = self.normalize_target_date(interval, target_date)
+        return self.memoized(
+            snapshot,
+            ('horizon', tuple(countries), interval, self.period_key(snapshot, interval, target_date), horizon),
+            lambda: self._forecast_horizon(snapshot, countries, interval, horizon, target_date)
+        )
     
-    def prepare_weekly_features(self):
-        """Prepare features for weekly prediction and fit scaler"""
+    def _forecast_horizon(self, snapshot, countries, interval, horizon, target_date):
+        trajectories = {}
+        if self.backend(interval) is not None:
+            inputs, scaler = snapshot.inputs(interval), snapshot.scaler(interval)
+            try:
+                rows = [
+                    (country, snapshot.country_ids[country]) for country in countries
+                    if country in snapshot.country_ids and inputs.valid[snapshot.country_ids[country]]
+                ]
+                if rows:
+                    start = time.perf_counter()
+                    step_dates = self.horizon_dates(interval, target_date, horizon)
+                    batch = inputs.batch([index for _, index in rows],
+                                         [snapshot.date_features(interval, step_dates[0])] * len(rows))
+                    # Scaled value of zero outbreaks, so negative outputs do not feed back
+                    floor = scaler.min_[0]
+                    scaled_steps = np.empty((horizon, len(rows)))
+                    for step in range(horizon):
+                        if step > 0:
+                            batch[:, :-1, 0] = batch[:, 1:, 0]
+                            batch[:, -1, 0] = np.maximum(scaled_steps[step - 1], floor)
+                            batch[:, :, 2:] = snapshot.date_features(interval, step_dates[step])
+                        scaled_steps[step] = self.infer(interval, batch).reshape(-1)
+                    actual_steps = scaler.inverse_transform(scaled_steps.reshape(-1, 1)).reshape(horizon, len(rows))
+                    INFERENCE_LATENCY.observe(time.perf_counter() - start, interval, 'rollout')
+                    for column, (country, _) in enumerate(rows):
+                        trajectories[country] = [max(0, round(float(value))) for value in actual_steps[:, column]]
+            except Exception as e:
+                print(f"{interval.capitalize()} rollout failed, using fallback: {e}")
+                trajectories = {}
+        
+        return {
+            country: trajectories[country] if country in trajectories
+            else [self.fallback_value(interval, country, snapshot)] * horizon
+            for country in countries
+        }
+    
+    def normalize_target_date(self, interval, target_date):
+        """Default a missing target date and convert strings to timestamps"""
+        # Set default target date if not provided
+        if target_date is None:
+            if interval == 'weekly':
+                target_date = datetime.now() + timedelta(days=7)
+            elif interval == 'monthly':
+                target_date = datetime.now() + timedelta(days=30)
+        
+        # Convert target_date to proper format if it's a string
+        if isinstance(target_date, str):
+            if interval == 'monthly' and len(target_date) == 7:
+                # For monthly, ensure we have the first day of the month
+                target_date = target_date + '-01'
+            try:
+                # ISO dates (what the frontend sends) parse without pandas
+                target_date = datetime.fromisoformat(target_date)
+            except ValueError:
+                target_date = pd.to_datetime(target_date)
+        
+        return target_date
+    
+    def predict_many(self, requests):
+        """
+        Predict a list of (country, interval, target_date) requests.
+        
+        Inputs for each interval are gathered from its InputTensorBank into one
+        (N, seq_len, 5) array so each model runs a single forward pass. Results come back in request order.
+        """
+        # One data version for the whole batch
+        snapshot = self.current_snapshot()
+        
+        results = [None] * len(requests)
+        batches = {interval: ([], [], []) for interval in INPUT_SHAPES}
+        
+        for i, (country, interval, target_date) in enumerate(requests):
+            if country == 'all':
+                results[i] = self.predict_for_all_countries(interval, target_date, snapshot)
+                continue
+            if self.backend(interval) is None:
+                results[i] = self.fallback_prediction(interval, country, snapshot)
+                continue
+            try:
+                target_date = self.normalize_target_date(interval, target_date)
+                indices, features, positions = batches[interval]
+                indices.append(snapshot.input_index(interval, country))
+                features.append(snapshot.date_features(interval, target_date))
+                positions.append(i)
+            except Exception as e:
+                print(f"Batch input failed for {country} ({interval}), using fallback: {e}")
+                results[i] = self.fallback_prediction(interval, country, snapshot)
+        
+        for interval, (indices, features, positions) in batches.items():
+            if not indices:
+                continue
+            inputs, scaler = snapshot.inputs(interval), snapshot.scaler(interval)
+            try:
+                start = time.perf_counter()
+                scaled_predictions = self.infer(interval, inputs.batch(indices, features))
+                actual_predictions = scaler.inverse_transform(scaled_predictions.reshape(-1, 1))
+                INFERENCE_LATENCY.observe(time.perf_counter() - start, interval, 'batch')
+                for position, value in zip(positions, actual_predictions[:, 0]):
+                    results[position] = max(0, round(float(value)))
+            except Exception as e:
+                print(f"Batch {interval} prediction failed, using fallback: {e}")
+                for position in positions:
+                    results[position] = self.fallback_prediction(interval, requests[position][0], snapshot)
+        
+        return results
+    
+    def fallback_prediction(self, interval, country, snapshot=None):
+        """Fallback prediction using simple averaging"""
+        start = time.perf_counter()
         try:
-            weekly_agg = self.weekly_data.copy()
-            weekly_agg['Week'] = weekly_agg['Week'].astype(str)
-            
-            # Fixed: Added explicit format to avoid warning
-            weekly_agg['Week'] = pd.to_datetime(
-                weekly_agg['Week'].str.split('/').str[0], 
-                format='%Y-%m-%d'
-            )
-            
-            # Add time features like in training
-            weekly_agg['year'] = (weekly_agg['Week'].dt.year - self.min_year) / (self.max_year - self.min_year)
-            weekly_agg['month'] = weekly_agg['Week'].dt.month / 12.0
-            weekly_agg['week'] = weekly_agg['Week'].dt.isocalendar().week / 52.0
-            
-            weekly_agg = weekly_agg.sort_values(['country', 'Week'])
-            
-            # Drop rows with NaN values
-            weekly_agg = weekly_agg.dropna()
-            
-            # Check if we have enough data
-            if len(weekly_agg) < 24:
-                print("Warning: Not enough weekly data for prediction. Will use fallback methods.")
-                self.weekly_processed = weekly_agg
-                return
-            
-            # Fit the scaler on outbreak_count only - use .values to avoid warnings
-            self.weekly_scaler.fit(weekly_agg[['outbreak_count']].values)
-            
-            # Store the processed data
-            self.weekly_processed = weekly_agg
-            
-        except Exception as e:
-            print(f"Error preparing weekly features: {e}")
-            self.weekly_processed = pd.DataFrame()
+            return max(1, self.fallback_value(interval, country, snapshot))
+        finally:
+            INFERENCE_LATENCY.observe(time.perf_counter() - start, interval, 'fallback')
     
-    def prepare_monthly_features(self):
-        """Prepare features for monthly prediction and fit scaler"""
+    def fallback_value(self, interval, country, snapshot=None):
+        """
+        The rounded historical mean behind fallback_prediction, 0 when there is
+        none. Not floored at 1, so per-country values can be summed.
+        """
         try:
-            monthly_agg = self.monthly_data.copy()
-            monthly_agg['Month'] = monthly_agg['Month'].astype(str)
-            
-            # Fixed: Added explicit format to avoid warning
-            monthly_agg['Month'] = pd.to_datetime(
-                monthly_agg['Month'].str.split('/').str[0], 
-                format='%Y-%m'
-            )
-            
-            # Add time features like in training
-            monthly_agg['year'] = (monthly_agg['Month'].dt.year - self.min_year) / (self.max_year - self.min_year)
-            monthly_agg['month'] = monthly_agg['Month'].dt.month / 12.0
-            monthly_agg['week'] = 0.5  # Default mid-month value
-            
-            monthly_agg = monthly_agg.sort_values(['country', 'Month'])
-            
-            # Drop rows with NaN values
-            monthly_agg = monthly_agg.dropna()
-            
-            # Check if we have enough data
-            if len(monthly_agg) < 12:
-                print("Warning: Not enough monthly data for prediction. Will use fallback methods.")
-                self.monthly_processed = monthly_agg
-                return
-            
-            # Fit the scaler on outbreak_count only - use .values to avoid warnings
-            self.monthly_scaler.fit(monthly_agg[['outbreak_count']].values)
-            
-            # Store the processed data
-            self.monthly_processed = monthly_agg
-            
+            # Mean outbreaks over the periods that had any, precomputed per data version
+            stats = (snapshot or self.snapshot).stats
+            return round(stats.fallback_mean(interval, country) or 0)
         except Exception as e:
-            print(f"Error preparing monthly features: {e}")
-            self.monthly_processed = pd.DataFrame()
+            print(f"Error in fallback prediction: {e}")
+            return 0
     
-    def prepare_weekly_input(self, target_date, country):
-        """Prepare input for weekly prediction with the correct features (5 features)"""
-        try:
-            if self.weekly_processed is None or len(self.weekly_processed) == 0:
-                raise ValueError("Weekly data not processed. Please load data first.")
+    def prepare_data(self):
+        """
+        Load and process the whole CSV into a new snapshot and publish it.
+        If anything fails the current snapshot stays in place.
+        """
+        start = time.perf_counter()
+        with self._refresh_lock:
+            try:
+                # Check if data file exists
+                if not os.path.exists(CSV_PATH):
+                    raise FileNotFoundError(f"Data file not found: {CSV_PATH}")
+                    
+                # Load the typed columns (dates and numbers already parsed), shared with the app
+                table = load_outbreak_table(CSV_PATH)
+                df = table.frame()
+                draft = DataSnapshot(self.country_encoder.classes_, INPUT_SHAPES)
+                draft.raw_data = df  # Store raw data for potential future use
                 
-            # Get the last 24 weeks of processed data for the specific country
-            country_data = self.weekly_processed[self.weekly_processed['country'] == country]
-            if len(country_data) < 24:
-                raise ValueError(f"Not enough data for {country}. Need at least 24 weeks of data.")
+                # Check if we have enough data
+                if len(df) < 10:
+                    raise ValueError("Not enough data for prediction. Need at least 10 records.")
                 
-            last_24_weeks = country_data.iloc[-24:].copy()
-            
-            # Get the outbreak count values
-            outbreak_data = last_24_weeks[['outbreak_count']].values
-            
-            # Scale the features - reshape to match the expected format
-            scaled_features = self.weekly_scaler.transform(outbreak_data.reshape(-1, 1))
-            
-            # Get country ID
-            country_id = self.country_encoder.transform([country])[0]
-            country_ids = np.full((24, 1), country_id)
-            
-            # Get time features for the prediction period (target date)
-            # Convert target_date to datetime if it's a string
-            if isinstance(target_date, str):
-                target_date = pd.to_datetime(target_date)
+                # Filter to only include the 48 countries used in training
+                df = df[df['country'].isin(self.countries_48)]
                 
-            # Calculate time features for the target date
-            year = (target_date.year - self.min_year) / (self.max_year - self.min_year)
-            month = target_date.month / 12.0
-            week = target_date.isocalendar().week / 52.0
-            
-            # Create time features array (repeated for all 24 timesteps)
-            time_features = np.array([[year, month, week]] * 24)
-            
-            # Combine all features (shape: 24, 5)
-            combined_data = np.concatenate([
-                scaled_features, 
-                country_ids, 
-                time_features
-            ], axis=1)
-            
-            # Reshape for LSTM input (samples, timesteps, features)
-            return combined_data.reshape(1, 24, 5)
+                # Update min and max years based on actual data
+                if len(df) > 0:
+                    draft.min_year = df['start_date'].dt.year.min()
+                    draft.max_year = df['start_date'].dt.year.max()
+                
+                # Dense panels, built from scratch on a full reload
+                draft.add_to_panels(df)
+                
+                # Fit the scalers and fill the model inputs from the panels
+                for interval in INPUT_SHAPES:
+                    draft.refresh_model_inputs(interval)
+                draft.complete(table.source)
+                self.publish(draft)
+                
+                print("Data prepared for prediction")
+                DATA_RELOADS.inc('success')
+            except Exception as e:
+                print(f"Error preparing data: {e}. Keeping the current data.")
+                DATA_RELOADS.inc('error')
+            finally:
+                DATA_RELOAD_LATENCY.observe(time.perf_counter() - start)
+    
+    def prepare_weekly_input(self, snapshot, target_date, country):
+        """
+        Prepare input for weekly prediction (1, 24, 5). Returns this thread's
+        scratch buffer: feed it to the model before preparing another input.
+        """
+        try:
+            index = snapshot.input_index('weekly', country)
+            return snapshot.weekly_inputs.sample(index, snapshot.date_features('weekly', target_date))
         except Exception as e:
             print(f"Error preparing weekly input for {country}: {e}")
             raise
     
-    def prepare_monthly_input(self, target_date, country):
-        """Prepare input for monthly prediction with the correct features (5 features)"""
+    def prepare_monthly_input(self, snapshot, target_date, country):
+        """
+        Prepare input for monthly prediction (1, 12, 5). Returns this thread's
+        scratch buffer: feed it to the model before preparing another input.
+        """
         try:
-            if self.monthly_processed is None or len(self.monthly_processed) == 0:
-                raise ValueError("Monthly data not processed. Please load data first.")
-                
-            # Get the last 12 months of processed data for the specific country
-            country_data = self.monthly_processed[self.monthly_processed['country'] == country]
-            if len(country_data) < 12:
-                raise ValueError(f"Not enough data for {country}. Need at least 12 months of data.")
-                
-            last_12_months = country_data.iloc[-12:].copy()
-            
-            # Get the outbreak count values
-            outbreak_data = last_12_months[['outbreak_count']].values
-            
-            # Scale the features - reshape to match the expected format
-            scaled_features = self.monthly_scaler.transform(outbreak_data.reshape(-1, 1))
-            
-            # Get country ID
-            country_id = self.country_encoder.transform([country])[0]
-            country_ids = np.full((12, 1), country_id)
-            
-            # Get time features for the prediction period (target date)
-            # Convert target_date to datetime if it's a string
-            if isinstance(target_date, str):
-                target_date = pd.to_datetime(target_date)
-                
-            # Calculate time features for the target date
-            year = (target_date.year - self.min_year) / (self.max_year - self.min_year)
-            month = target_date.month / 12.0
-            week = 0.5  # Default mid-month value
-            
-            # Create time features array (repeated for all 12 timesteps)
-            time_features = np.array([[year, month, week]] * 12)
-            
-            # Combine all features (shape: 12, 5)
-            combined_data = np.concatenate([
-                scaled_features, 
-                country_ids, 
-                time_features
-            ], axis=1)
-            
-            # Reshape for LSTM input (samples, timesteps, features)
-            return combined_data.reshape(1, 12, 5)
+            index = snapshot.input_index('monthly', country)
+            return snapshot.monthly_inputs.sample(index, snapshot.date_features('monthly', target_date))
         except Exception as e:
             print(f"Error preparing monthly input for {country}: {e}")
             raise
     
-    def predict_weekly(self, target_date, country):
+    def predict_weekly(self, snapshot, target_date, country):
         """Make a weekly prediction"""
         try:
             # First try to use the model if available
-            if self.weekly_model is not None:
+            if self.backend('weekly') is not None:
                 try:
-                    input_data = self.prepare_weekly_input(target_date, country)
-                    scaled_prediction = self.weekly_model.predict(input_data, verbose=0)
+                    start = time.perf_counter()
+                    input_data = self.prepare_weekly_input(snapshot, target_date, country)
+                    scaled_prediction = self.infer('weekly', input_data)
                     
                     # Inverse transform the prediction
-                    actual_prediction = self.weekly_scaler.inverse_transform(scaled_prediction.reshape(-1, 1))
+                    actual_prediction = snapshot.weekly_scaler.inverse_transform(scaled_prediction.reshape(-1, 1))
                     
                     result = max(0, round(float(actual_prediction[0][0])))
+                    INFERENCE_LATENCY.observe(time.perf_counter() - start, 'weekly', 'model')
                     return result
                 except Exception as e:
                     print(f"Model prediction failed for {country}, using fallback: {e}")
             
             # Fallback: use simple average of recent data
-            return self.fallback_prediction('weekly', country)
+            return self.fallback_prediction('weekly', country, snapshot)
                 
         except Exception as e:
             print(f"Error in weekly prediction for {country}: {e}")
-            return self.fallback_prediction('weekly', country)
+            return self.fallback_prediction('weekly', country, snapshot)
     
-    def predict_monthly(self, target_date, country):
+    def predict_monthly(self, snapshot, target_date, country):
         """Make a monthly prediction"""
         try:
             # First try to use the model if available
-            if self.monthly_model is not None:
+            if self.backend('monthly') is not None:
                 try:
-                    input_data = self.prepare_monthly_input(target_date, country)
-                    scaled_prediction = self.monthly_model.predict(input_data, verbose=0)
+                    start = time.perf_counter()
+                    input_data = self.prepare_monthly_input(snapshot, target_date, country)
+                    scaled_prediction = self.infer('monthly', input_data)
                     
                     # Inverse transform the prediction
-                    actual_prediction = self.monthly_scaler.inverse_transform(scaled_prediction.reshape(-1, 1))
+                    actual_prediction = snapshot.monthly_scaler.inverse_transform(scaled_prediction.reshape(-1, 1))
                     
                     result = max(0, round(float(actual_prediction[0][0])))
+                    INFERENCE_LATENCY.observe(time.perf_counter() - start, 'monthly', 'model')
                     return result
                 except Exception as e:
                     print(f"Model prediction failed for {country}, using fallback: {e}")
             
             # Fallback: use simple average of recent data
-            return self.fallback_prediction('monthly', country)
+            return self.fallback_prediction('monthly', country, snapshot)
                 
         except Exception as e:
             print(f"Error in monthly prediction for {country}: {e}")
-            return self.fallback_prediction('monthly', country)
+            return self.fallback_prediction('monthly', country, snapshot)
 
-# Initialize the predictor
+# Initialize the predictor. Loading TensorFlow and the models, preparing the data
+# and warming up happen on a background thread so the app can bind immediately;
+# /readyz reports when predictions are ready to serve.
 predictor = OutbreakPredictor()
-models_loaded = predictor.load_models_with_fallback()
-
-# Check which countries have data issues
-predictor.check_country_data_availability()
-
-if not models_loaded:
-    print("Warning: Could not load some models. Fallback predictions will be used.")
\ No newline at end of file
+if os.environ.get('PREDICTOR_DEFER_MODEL_LOAD') == '1':
+    # Forking servers (gunicorn.conf.py) start the model loader in each worker:
+    # TensorFlow is not fork-safe once its runtime has executed ops, so only the
+    # prepared data is shared from the master process
+    predictor.prepare_data()
+    predictor.check_country_data_availability()
+else:
+    predictor.start_background_load()
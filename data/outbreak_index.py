@@ -0,0 +1,87 @@
+# data/outbreak_index.py
+import heapq
+import json
+from bisect import bisect_left, bisect_right
+
+from data.columnar import to_epoch_days
+
+
+def parse_query_date(value):
+    """Accept 'YYYY-MM-DD' or 'YYYY/MM/DD' query values and return epoch days"""
+    days = to_epoch_days(value.replace('-', '/'))
+    if days is None:
+        raise ValueError(f"Invalid date: {value}")
+    return days
+
+
+class OutbreakIndex:
+    """
+    Sorted indexes over one version of the outbreak rows.
+
+    Rows are ordered by start_date for time-range queries and by
+    (country, start_date) with a country -> row-range map, so a query is two
+    binary searches plus a slice instead of a scan over every record.
+    Rows without a start_date only appear when no date bounds are given.
+    """
+
+    def __init__(self, rows):
+        self.length = len(rows)
+        # Pre-serialize each row so a response is just a join over the hits
+        self.row_json = [json.dumps(row, separators=(',', ':')) for row in rows]
+
+        dated = []
+        self.undated = []
+        for i, row in enumerate(rows):
+            day = to_epoch_days(row.get('start_date'))
+            if day is None:
+                self.undated.append(i)
+            else:
+                dated.append((day, i))
+
+        dated.sort()
+        self.date_keys = [day for day, _ in dated]
+        self.by_date = [i for _, i in dated]
+
+        by_country = sorted((rows[i].get('country') or '', day, i) for day, i in dated)
+        self.country_keys = [day for _, day, _ in by_country]
+        self.by_country = [i for _, _, i in by_country]
+        self.country_ranges = {}
+        for pos, (country, _, _) in enumerate(by_country):
+            lo, _ = self.country_ranges.get(country, (pos, pos))
+            self.country_ranges[country] = (lo, pos + 1)
+
+        self.undated_by_country = {}
+        for i in self.undated:
+            self.undated_by_country.setdefault(rows[i].get('country') or '', []).append(i)
+
+    def _bounds(self, keys, lo, hi, start_day, end_day):
+        """Narrow keys[lo:hi] to the positions whose start day lies in [start_day, end_day]"""
+        if start_day is not None:
+            lo = bisect_left(keys, start_day, lo, hi)
+        if end_day is not None:
+            hi = bisect_right(keys, end_day, lo, hi)
+        return lo, hi
+
+    def query(self, start_day=None, end_day=None, countries=None):
+        """Return matching row indices ordered by start_date"""
+        bounded = start_day is not None or end_day is not None
+        if not countries:
+            lo, hi = self._bounds(self.date_keys, 0, len(self.date_keys), start_day, end_day)
+            hits = self.by_date[lo:hi]
+            return hits if bounded else hits + self.undated
+
+        parts = []
+        for country in countries:
+            if country in self.country_ranges:
+                lo, hi = self._bounds(self.country_keys, *self.country_ranges[country], start_day, end_day)
+                parts.append(zip(self.country_keys[lo:hi], self.by_country[lo:hi]))
+        # Each country range is already date-sorted, so several countries just need a merge
+        hits = [i for _, i in heapq.merge(*parts)]
+        if not bounded:
+            for country in countries:
+                hits.extend(self.undated_by_country.get(country, []))
+        return hits
+
+    def rows_json(self, indices):
+        """Serialize the selected rows as a JSON array"""
+        return '[' + ','.join(self.row_json[i] for i in indices) + ']'
@@ -0,0 +1,379 @@
+# data/outbreak_table.py
+import csv
+import hashlib
+import io
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from data.columnar import MISSING_INT, to_epoch_days, to_int
+
+# Bump when the file layout changes, so existing sidecars are rebuilt
+TABLE_FORMAT = 1
+
+# Blocks start on multiples of this many bytes, so every column can be viewed in place
+ALIGNMENT = 8
+
+
+def sidecar_path(csv_path):
+    """Where the compiled table of a CSV lives, e.g. data/wahis_outbreak_details.columns"""
+    return os.path.splitext(csv_path)[0] + '.columns'
+
+
+def parse_lat_long(text):
+    """'40.1239 , 44.0044' -> (40.1239, 44.0044); '-' and blanks give (None, None)"""
+    if not text or text == '-':
+        return None, None
+    try:
+        lat, lon = text.split(',')
+        return float(lat.strip()), float(lon.strip())
+    except Exception as e:
+        print(f"Error parsing coordinates: {e}")
+        return None, None
+
+
+def parse_csv_text(text, fieldnames=None, countries=None):
+    """
+    Typed columns of outbreak CSV text. Without fieldnames the first line is
+    the header. Country codes index countries, which is extended in place
+    with countries not seen before. Returns (columns, fieldnames).
+    """
+    reader = csv.reader(io.StringIO(text))
+    if fieldnames is None:
+        fieldnames = next(reader, [])
+    if countries is None:
+        countries = []
+    position = {name: i for i, name in enumerate(fieldnames)}
+    country_codes = {country: i for i, country in enumerate(countries)}
+
+    def field(record, name):
+        i = position.get(name)
+        return record[i] if i is not None and i < len(record) else ''
+
+    # Many rows share a date, and strptime is the slow part of a row
+    days = {}
+
+    def day(value):
+        if value not in days:
+            days[value] = to_epoch_days(value if value != '-' else None)
+        return MISSING_INT if days[value] is None else days[value]
+
+    values = {name: [] for name in ('country', 'location', 'lat_long', 'start_date', 'end_date',
+                                    'lat', 'lon', 'cases', 'deaths')}
+    for record in reader:
+        if not record:
+            continue
+        country = field(record, 'country')
+        code = country_codes.get(country)
+        if code is None:
+            code = country_codes[country] = len(countries)
+            countries.append(country)
+        lat_long = field(record, 'lat_long')
+        lat, lon = parse_lat_long(lat_long)
+        cases, deaths = to_int(field(record, 'cases')), to_int(field(record, 'deaths'))
+        values['country'].append(code)
+        values['location'].append(field(record, 'location'))
+        values['lat_long'].append(lat_long)
+        values['start_date'].append(day(field(record, 'start_date')))
+        values['end_date'].append(day(field(record, 'end_date')))
+        values['lat'].append(np.nan if lat is None else lat)
+        values['lon'].append(np.nan if lon is None else lon)
+        values['cases'].append(MISSING_INT if cases is None else cases)
+        values['deaths'].append(MISSING_INT if deaths is None else deaths)
+
+    columns = {
+        'country': np.array(values['country'], dtype='<u2'),
+        'location': TextColumn.from_strings(values['location']),
+        'lat_long': TextColumn.from_strings(values['lat_long']),
+        'start_date': np.array(values['start_date'], dtype='<i4'),
+        'end_date': np.array(values['end_date'], dtype='<i4'),
+        'lat': np.array(values['lat'], dtype='<f4'),
+        'lon': np.array(values['lon'], dtype='<f4'),
+        'cases': np.array(values['cases'], dtype='<i4'),
+        'deaths': np.array(values['deaths'], dtype='<i4'),
+    }
+    return columns, fieldnames
+
+
+class TextColumn:
+    """
+    Strings as one UTF-8 byte array plus int64 offsets (row i is
+    data[offsets[i]:offsets[i + 1]]), as in Arrow, so text is stored at its
+    actual length rather than padded to the longest value.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_strings(cls, values):
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(offsets, np.frombuffer(b''.join(encoded), dtype='uint8'))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def tolist(self, start=0):
+        data = self.data.tobytes()
+        offsets = self.offsets[start:].tolist()
+        return [data[a:b].decode('utf-8') for a, b in zip(offsets, offsets[1:])]
+
+    def concat(self, other):
+        offsets = np.concatenate([self.offsets, other.offsets[1:] + self.offsets[-1]])
+        return TextColumn(offsets, np.concatenate([self.data, other.data]))
+
+
+def format_days(days):
+    """Epoch days as 'YYYY/MM/DD' strings, None where missing"""
+    text = np.datetime_as_string(days.astype('datetime64[D]')).tolist()
+    return [None if d == MISSING_INT else t.replace('-', '/') for d, t in zip(days.tolist(), text)]
+
+
+class OutbreakTable:
+    """
+    One version of the outbreak CSV as typed columns: country codes into
+    a dictionary (uint16), epoch-day dates and cases/deaths (int32, -1 when
+    missing), float32 lat/lon (NaN when missing) and the location and
+    lat_long text. Loaded from the sidecar the columns are read-only
+    memory-mapped views, so every process reading one version shares its pages.
+    """
+
+    def __init__(self, columns, countries, source, base=None):
+        self.columns = columns
+        self.countries = countries
+        # mtime_ns, size and sha1 digest of the CSV these columns were compiled from
+        self.source = source
+        self.digest = source['digest']
+        # Digest and row count of the version this one was appended to, if any
+        self.base = base
+        self.length = len(columns['country'])
+
+    def __len__(self):
+        return self.length
+
+    def appended(self, tail_columns, countries, source):
+        """A new table with tail rows added after these ones"""
+        columns = {}
+        for name, values in self.columns.items():
+            if isinstance(values, TextColumn):
+                columns[name] = values.concat(tail_columns[name])
+            else:
+                columns[name] = np.concatenate([values, tail_columns[name]])
+        return OutbreakTable(columns, countries, source, base={'digest': self.digest, 'length': self.length})
+
+    def rows(self, start=0):
+        """
+        Rows from start on as the dicts /api/data serves: the CSV fields as
+        text plus lat/lon floats and type. Dates are written back as
+        'YYYY/MM/DD' and missing cases/deaths as '-'.
+        """
+        columns = self.columns
+        country = columns['country'][start:].tolist()
+        location = columns['location'].tolist(start)
+        lat_long = columns['lat_long'].tolist(start)
+        start_date = format_days(columns['start_date'][start:])
+        end_date = format_days(columns['end_date'][start:])
+        cases = columns['cases'][start:].tolist()
+        deaths = columns['deaths'][start:].tolist()
+
+        rows = []
+        for i in range(len(country)):
+            # The JSON carries the coordinates at full precision, not the float32 columns
+            lat, lon = parse_lat_long(lat_long[i])
+            rows.append({
+                'country': self.countries[country[i]],
+                'location': location[i],
+                'lat_long': lat_long[i],
+                'start_date': start_date[i],
+                'end_date': end_date[i],
+                'cases': str(cases[i]) if cases[i] != MISSING_INT else '-',
+                'deaths': str(deaths[i]) if deaths[i] != MISSING_INT else '-',
+                'lat': lat,
+                'lon': lon,
+                'type': 'actual',
+            })
+        return rows
+
+    def frame(self, start=0):
+        """
+        Rows from start on as a DataFrame for the predictor: categorical
+        country, datetime64 dates (NaT when missing) and cases/deaths with
+        missing as 0.
+        """
+        columns = self.columns
+
+        def dates(name):
+            days = columns[name][start:]
+            values = days.astype('datetime64[D]').astype('datetime64[ns]')
+            values[days == MISSING_INT] = np.datetime64('NaT')
+            return values
+
+        def counts(name):
+            values = columns[name][start:]
+            return np.where(values == MISSING_INT, 0, values)
+
+        return pd.DataFrame({
+            'country': pd.Categorical.from_codes(columns['country'][start:].astype('int32'),
+                                                 categories=self.countries),
+            'location': columns['location'].tolist(start),
+            'lat': columns['lat'][start:],
+            'lon': columns['lon'][start:],
+            'start_date': dates('start_date'),
+            'end_date': dates('end_date'),
+            'cases': counts('cases'),
+            'deaths': counts('deaths'),
+        })
+
+    def column_lists(self):
+        """The fields of columnar.build_columns, built from the typed columns instead of the rows"""
+        columns = self.columns
+
+        def ints(name):
+            return [None if v == MISSING_INT else v for v in columns[name].tolist()]
+
+        coords = np.empty(self.length * 2, dtype='<f4')
+        coords[0::2] = columns['lat']
+        coords[1::2] = columns['lon']
+        # build_columns only keeps coordinates where both are present
+        coords[np.repeat(np.isnan(columns['lat']) | np.isnan(columns['lon']), 2)] = np.nan
+        return {
+            'length': self.length,
+            'countries': list(self.countries),
+            'country': columns['country'].tolist(),
+            'location': columns['location'].tolist(),
+            'start_date': ints('start_date'),
+            'end_date': ints('end_date'),
+            'cases': ints('cases'),
+            'deaths': ints('deaths'),
+            'coords': coords,
+        }
+
+
+def table_blocks(columns):
+    """The arrays to store for each column; a TextColumn is two blocks, name.offsets and name.data"""
+    for name, values in columns.items():
+        if isinstance(values, TextColumn):
+            yield f'{name}.offsets', values.offsets
+            yield f'{name}.data', values.data
+        else:
+            yield name, values
+
+
+def write_table(path, table):
+    """
+    Write a table as: uint32 header length, UTF-8 JSON header padded to
+    ALIGNMENT, then each block's raw little-endian bytes at the offset the
+    header gives. The file is written next to path and renamed over it, so
+    readers see the old or the new version, never a partial one.
+    """
+    specs = {}
+    offset = 0
+    for name, values in table_blocks(table.columns):
+        offset += -offset % ALIGNMENT
+        specs[name] = {'dtype': values.dtype.str, 'length': len(values), 'offset': offset}
+        offset += values.nbytes
+    header = json.dumps({
+        'format': TABLE_FORMAT,
+        'source': table.source,
+        'base': table.base,
+        'countries': table.countries,
+        'columns': {name: 'text' if isinstance(values, TextColumn) else 'array'
+                    for name, values in table.columns.items()},
+        'blocks': specs,
+    }, separators=(',', ':')).encode('utf-8')
+    header += b' ' * (-(4 + len(header)) % ALIGNMENT)
+    data_start = 4 + len(header)
+
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.columns.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for name, values in table_blocks(table.columns):
+                f.seek(data_start + specs[name]['offset'])
+                f.write(np.ascontiguousarray(values).tobytes())
+        # mkstemp creates the file owner-only; the sidecar is as readable as the CSV
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_table(path):
+    """Memory-map a table written by write_table, or return None if it has another format"""
+    with open(path, 'rb') as f:
+        (header_length,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_length))
+    if header.get('format') != TABLE_FORMAT:
+        return None
+    data_start = 4 + header_length
+    buffer = np.memmap(path, dtype='uint8', mode='r')
+
+    def block(name):
+        spec = header['blocks'][name]
+        return np.ndarray((spec['length'],), dtype=spec['dtype'], buffer=buffer, offset=data_start + spec['offset'])
+
+    columns = {}
+    for name, kind in header['columns'].items():
+        columns[name] = TextColumn(block(f'{name}.offsets'), block(f'{name}.data')) if kind == 'text' else block(name)
+    return OutbreakTable(columns, header['countries'], header['source'], header['base'])
+
+
+def load_outbreak_table(csv_path):
+    """
+    Return the typed table of csv_path, from its sidecar file when the
+    sidecar was compiled from the CSV's current contents. Otherwise the CSV
+    is compiled - only the appended tail when the old contents are a prefix
+    of the new ones - and the sidecar is rewritten. A cheap os.stat() decides
+    whether the CSV needs hashing at all.
+    """
+    path = sidecar_path(csv_path)
+    st = os.stat(csv_path)
+    table = None
+    try:
+        table = read_table(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Ignoring unreadable table {path}: {e}")
+    if table is not None and (st.st_mtime_ns, st.st_size) == (table.source['mtime_ns'], table.source['size']):
+        return table
+
+    with open(csv_path, 'rb') as f:
+        content = f.read()
+    source = {'mtime_ns': st.st_mtime_ns, 'size': len(content), 'digest': hashlib.sha1(content).hexdigest()}
+
+    old_size = table.source['size'] if table is not None else 0
+    if table is not None and source['digest'] == table.digest:
+        # Touched but unchanged - keep the columns, remember the new mtime
+        table = OutbreakTable(table.columns, table.countries, source, table.base)
+    elif (table is not None and len(content) > old_size and content[old_size - 1:old_size] == b'\n'
+          and hashlib.sha1(content[:old_size]).hexdigest() == table.digest):
+        fieldnames = next(csv.reader(io.StringIO(content[:old_size].decode('utf-8-sig'))), [])
+        countries = list(table.countries)
+        tail, _ = parse_csv_text(content[old_size:].decode('utf-8'), fieldnames, countries)
+        table = table.appended(tail, countries, source)
+        print(f"Outbreak table appended {len(tail['country'])} rows")
+    else:
+        countries = []
+        columns, _ = parse_csv_text(content.decode('utf-8-sig'), countries=countries)
+        table = OutbreakTable(columns, countries, source)
+        print(f"Outbreak table compiled: {table.length} rows")
+
+    try:
+        write_table(path, table)
+        return read_table(path)
+    except Exception as e:
+        # Serve the in-memory table; the next load tries to write it again
+        print(f"Could not write table {path}: {e}")
+        return table
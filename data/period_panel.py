@@ -0,0 +1,125 @@
+# data/period_panel.py
+import numpy as np
+
+
+def period_ordinals(interval, dates):
+    """Period number of each datetime64 date: Monday-start weeks or calendar months since 1970"""
+    if interval == 'weekly':
+        days = dates.astype('datetime64[D]').astype('int64')
+        # 1970-01-01 was a Thursday; weeks start on the Monday three days earlier
+        return (days + 3) // 7
+    return dates.astype('datetime64[M]').astype('int64')
+
+
+def period_starts(interval, ordinals):
+    """First day of each period number, as datetime64[D]"""
+    ordinals = np.asarray(ordinals, dtype='int64')
+    if interval == 'weekly':
+        return (ordinals * 7 - 3).astype('datetime64[D]')
+    return ordinals.astype('datetime64[M]').astype('datetime64[D]')
+
+
+class PeriodPanel:
+    """
+    Dense country x period outbreak counts for one interval, as in the
+    notebook's build_regular_panel: every period between the first and last
+    outbreak has a column, so periods without outbreaks are zeros rather
+    than missing rows and the last n columns are the last n calendar
+    periods. Row i is country id i.
+
+    Counts live in an int32 matrix with spare columns, so adding rows for new
+    periods extends it in place (reallocating only when capacity doubles).
+    A panel that readers may be using is not added to: add to a copy().
+    """
+
+    def __init__(self, interval, countries, capacity=64):
+        self.interval = interval
+        self.countries = list(countries)
+        self.country_ids = {country: i for i, country in enumerate(self.countries)}
+        # Period number of column 0 (None until the first outbreak is added)
+        self.first = None
+        self.n_periods = 0
+        self._counts = np.zeros((len(self.countries), capacity), dtype='int32')
+
+    @property
+    def counts(self):
+        """The (n_countries, n_periods) matrix (a view)"""
+        return self._counts[:, :self.n_periods]
+
+    def copy(self):
+        """An independent panel with the same counts and spare capacity"""
+        panel = PeriodPanel(self.interval, self.countries, capacity=0)
+        panel.first = self.first
+        panel.n_periods = self.n_periods
+        panel._counts = self._counts.copy()
+        return panel
+
+    def add(self, countries, dates, weights=None):
+        """
+        Count one outbreak per (country, start date) pair, or add its weight
+        (e.g. its cases) instead. Unknown countries and missing dates are
+        skipped. Returns the number of outbreaks counted.
+        """
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        ids = np.fromiter((self.country_ids.get(country, -1) for country in countries),
+                          dtype='int64', count=len(dates))
+        keep = (ids >= 0) & ~np.isnat(dates)
+        if not keep.any():
+            return 0
+        ids = ids[keep]
+        if weights is not None:
+            weights = np.asarray(weights, dtype='float64')[keep]
+        ordinals = period_ordinals(self.interval, dates[keep])
+        low, high = int(ordinals.min()), int(ordinals.max())
+
+        if self.first is None:
+            self.first = low
+        if low < self.first:
+            self._prepend(self.first - low)
+        if high - self.first + 1 > self.n_periods:
+            self._extend(high - self.first + 1)
+
+        # Aggregate only the columns these outbreaks touch
+        width = high - low + 1
+        flat = ids * width + (ordinals - low)
+        touched = np.bincount(flat, weights=weights, minlength=len(self.countries) * width)
+        offset = low - self.first
+        self._counts[:, offset:offset + width] += touched.reshape(len(self.countries), width).astype('int32')
+        return len(ids)
+
+    def _extend(self, n_periods):
+        capacity = self._counts.shape[1]
+        if n_periods > capacity:
+            counts = np.zeros((len(self.countries), max(n_periods, 2 * capacity)), dtype='int32')
+            counts[:, :self.n_periods] = self.counts
+            self._counts = counts
+        self.n_periods = n_periods
+
+    def _prepend(self, n_columns):
+        # Rare (rows dated before everything seen so far): shift into a new matrix
+        counts = np.zeros((len(self.countries), max(self._counts.shape[1], self.n_periods + n_columns)),
+                          dtype='int32')
+        counts[:, n_columns:n_columns + self.n_periods] = self.counts
+        self._counts = counts
+        self.first -= n_columns
+        self.n_periods += n_columns
+
+    def length(self, country):
+        return self.n_periods if country in self.country_ids else 0
+
+    def row(self, country):
+        """All period counts of a country, oldest first (a view)"""
+        return self._counts[self.country_ids[country], :self.n_periods]
+
+    def window(self, country, size):
+        """The last size period counts of a country (a view), or None if the panel is shorter"""
+        index = self.country_ids.get(country)
+        if index is None or self.n_periods < size:
+            return None
+        return self._counts[index, self.n_periods - size:self.n_periods]
+
+    def period_starts(self):
+        """First day of each column's period"""
+        if self.first is None:
+            return np.array([], dtype='datetime64[D]')
+        return period_starts(self.interval, np.arange(self.first, self.first + self.n_periods))
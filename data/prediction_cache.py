@@ -0,0 +1,82 @@
+# data/prediction_cache.py
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    Bounded, thread-safe LRU cache for prediction results with a TTL.
+
+    Keys are tuples such as (client_id, country, interval, date). Entries
+    older than ttl seconds are treated as misses and dropped; when the cache
+    is full the least recently used entry is evicted. With max_bytes, the
+    values' sizes (as measured by sizeof) are bounded too.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600, clock=time.monotonic, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or sys.getsizeof
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            value, stored_at, size = item
+            if self.clock() - stored_at > self.ttl:
+                del self._entries[key]
+                self._bytes -= size
+                self.evictions += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (value, self.clock(), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes and len(self._entries) > 1):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
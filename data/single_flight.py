@@ -0,0 +1,62 @@
+# data/single_flight.py
+import threading
+
+from data.prediction_cache import PredictionCache
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls into one.
+
+    The first caller for a key runs fn(); callers arriving while it is in
+    flight wait for it and share its result (or its exception). With
+    result_ttl > 0 the result is also kept for that many seconds, so a burst
+    of identical requests arriving just after the computation finished is
+    served without running it again.
+    """
+
+    def __init__(self, result_ttl=0, max_results=256):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._results = PredictionCache(max_entries=max_results, ttl=result_ttl) if result_ttl > 0 else None
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        if self._results is not None:
+            result = self._results.get(key)
+            if result is not None:
+                return result
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            if self._results is not None:
+                self._results.put(key, call.result)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -0,0 +1,202 @@
+# data/stats_cube.py
+import numpy as np
+
+
+def year_groups(panel):
+    """(years, start column of each year) of a panel's columns; periods belong to the year they start in"""
+    years = panel.period_starts().astype('datetime64[Y]').astype('int64') + 1970
+    if len(years) == 0:
+        return years, years
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(years)) + 1))
+    return years[starts], starts
+
+
+def ratio(numerator, denominator):
+    """numerator / denominator elementwise, 0 where the denominator is 0"""
+    numerator = np.asarray(numerator, dtype='float64')
+    denominator = np.broadcast_to(np.asarray(denominator, dtype='float64'), numerator.shape)
+    return np.divide(numerator, denominator, out=np.zeros(numerator.shape), where=denominator > 0)
+
+
+class IntervalStats:
+    """
+    Statistics of one PeriodPanel, per country x year (n_countries, n_years)
+    and per country over the whole panel:
+
+    - outbreaks: outbreaks in the year's periods
+    - active: periods with at least one outbreak
+    - periods: periods of the year covered by the panel (per year only)
+    - last: count in the year's last period
+    - last_outbreak: column of the country's latest non-zero period, or -1
+    """
+
+    def __init__(self, panel, years):
+        counts = panel.counts
+        n_countries = counts.shape[0]
+        self.n_periods = panel.n_periods
+        self.period_starts = panel.period_starts()
+
+        shape = (n_countries, len(years))
+        self.outbreaks = np.zeros(shape, dtype='int64')
+        self.active = np.zeros(shape, dtype='int64')
+        self.last = np.zeros(shape, dtype='int64')
+        self.periods = np.zeros(len(years), dtype='int64')
+        self.any_active = np.zeros(len(years), dtype='int64')
+
+        panel_years, starts = year_groups(panel)
+        if len(panel_years):
+            # Columns are in time order, so each year is one run of columns
+            columns = np.searchsorted(years, panel_years)
+            stops = np.append(starts[1:], self.n_periods)
+            active = counts > 0
+            self.outbreaks[:, columns] = np.add.reduceat(counts, starts, axis=1)
+            self.active[:, columns] = np.add.reduceat(active, starts, axis=1)
+            self.last[:, columns] = counts[:, stops - 1]
+            self.periods[columns] = stops - starts
+            self.any_active[columns] = np.add.reduceat(active.any(axis=0), starts)
+
+        self.total_outbreaks = self.outbreaks.sum(axis=1)
+        self.total_active = self.active.sum(axis=1)
+        self.latest = np.zeros(n_countries, dtype='int64')
+        self.last_outbreak = np.full(n_countries, -1, dtype='int64')
+        if self.n_periods:
+            self.latest[:] = counts[:, -1]
+            nonzero = counts > 0
+            latest_nonzero = self.n_periods - 1 - np.argmax(nonzero[:, ::-1], axis=1)
+            self.last_outbreak[:] = np.where(nonzero.any(axis=1), latest_nonzero, -1)
+
+
+class StatsCube:
+    """
+    Per country x interval x year outbreak statistics of one data version,
+    computed once from the dense panels so fallbacks, availability checks
+    and /api/stats are lookups rather than scans. Rebuilt (never updated)
+    when the data changes; treat as read-only.
+    """
+
+    def __init__(self, countries, panels, cases_panel, deaths_panel, version=None):
+        self.countries = list(countries)
+        self.country_ids = {country: i for i, country in enumerate(self.countries)}
+        self.version = version
+
+        found = [year_groups(panel)[0] for panel in (*panels.values(), cases_panel, deaths_panel)]
+        found = np.concatenate(found) if found else np.array([], dtype='int64')
+        self.years = np.arange(found.min(), found.max() + 1) if len(found) else np.array([], dtype='int64')
+
+        self.intervals = {interval: IntervalStats(panel, self.years) for interval, panel in panels.items()}
+        # Cases and deaths by the year of the outbreak start, the same for every interval
+        self.cases = IntervalStats(cases_panel, self.years).outbreaks
+        self.deaths = IntervalStats(deaths_panel, self.years).outbreaks
+        self._payload = None
+
+    def fallback_mean(self, interval, country):
+        """
+        Mean outbreaks per period with outbreaks (of one country, or all for
+        'all'), or None when there are none
+        """
+        stats = self.intervals.get(interval)
+        if stats is None:
+            return None
+        if country == 'all':
+            outbreaks, active = stats.total_outbreaks.sum(), stats.total_active.sum()
+        else:
+            index = self.country_ids.get(country)
+            if index is None:
+                return None
+            outbreaks, active = stats.total_outbreaks[index], stats.total_active[index]
+        return float(outbreaks / active) if active else None
+
+    def periods_since_outbreak(self, interval, country):
+        """Periods after the country's latest outbreak (0 if it is in the last period), or None if it has none"""
+        stats = self.intervals[interval]
+        last = stats.last_outbreak[self.country_ids[country]]
+        return int(stats.n_periods - 1 - last) if last >= 0 else None
+
+    def n_periods(self, interval):
+        return self.intervals[interval].n_periods
+
+    def summary(self, outbreaks, active, periods, last, cases, deaths):
+        """One JSON-ready set of values"""
+        return {
+            'outbreaks': int(outbreaks),
+            'active_periods': int(active),
+            'periods': int(periods),
+            'coverage': round(float(ratio(active, periods)), 4),
+            'mean': round(float(ratio(outbreaks, periods)), 4),
+            'active_mean': round(float(ratio(outbreaks, active)), 4),
+            'last': int(last),
+            'cases': int(cases),
+            'deaths': int(deaths),
+        }
+
+    def interval_payload(self, interval):
+        stats = self.intervals[interval]
+        starts = stats.period_starts
+        years = [str(year) for year in self.years.tolist()]
+
+        def by_year(outbreaks, active, last, cases, deaths):
+            return {
+                year: self.summary(outbreaks[j], active[j], stats.periods[j], last[j], cases[j], deaths[j])
+                for j, year in enumerate(years) if stats.periods[j]
+            }
+
+        countries = {}
+        for i, country in enumerate(self.countries):
+            entry = self.summary(stats.total_outbreaks[i], stats.total_active[i], stats.n_periods,
+                                 stats.latest[i], self.cases[i].sum(), self.deaths[i].sum())
+            last = stats.last_outbreak[i]
+            entry['last_outbreak'] = str(starts[last]) if last >= 0 else None
+            entry['periods_since_outbreak'] = int(stats.n_periods - 1 - last) if last >= 0 else None
+            entry['years'] = by_year(stats.outbreaks[i], stats.active[i], stats.last[i], self.cases[i], self.deaths[i])
+            countries[country] = entry
+
+        # Across countries an active period is one with an outbreak anywhere
+        total = self.summary(stats.total_outbreaks.sum(), stats.any_active.sum(), stats.n_periods,
+                             stats.latest.sum(), self.cases.sum(), self.deaths.sum())
+        total['years'] = by_year(stats.outbreaks.sum(axis=0), stats.any_active, stats.last.sum(axis=0),
+                                 self.cases.sum(axis=0), self.deaths.sum(axis=0))
+        return {
+            'first_period': str(starts[0]) if len(starts) else None,
+            'last_period': str(starts[-1]) if len(starts) else None,
+            'total': total,
+            'countries': countries,
+        }
+
+    def payload(self):
+        """The whole cube as a JSON-ready dict, built on first use"""
+        if self._payload is None:
+            self._payload = {
+                'version': self.version,
+                'years': self.years.tolist(),
+                'intervals': {interval: self.interval_payload(interval) for interval in self.intervals},
+            }
+        return self._payload
+
+    def query(self, intervals=None, countries=None, years=None):
+        """The payload narrowed to some intervals, countries and years (None keeps all)"""
+        payload = self.payload()
+        if intervals is None and countries is None and years is None:
+            return payload
+
+        def narrow_years(entry):
+            if years is None:
+                return entry
+            return dict(entry, years={year: values for year, values in entry['years'].items() if year in years})
+
+        result = {
+            'version': payload['version'],
+            'years': [year for year in payload['years'] if years is None or str(year) in years],
+            'intervals': {},
+        }
+        for interval, data in payload['intervals'].items():
+            if intervals is not None and interval not in intervals:
+                continue
+            result['intervals'][interval] = dict(
+                data,
+                total=narrow_years(data['total']),
+                countries={
+                    country: narrow_years(entry) for country, entry in data['countries'].items()
+                    if countries is None or country in countries
+                },
+            )
+        return result
@@ -0,0 +1,71 @@
+# gunicorn.conf.py
+#
+# Production entry point:
+#
+#     gunicorn -c gunicorn.conf.py app:app
+#
+# The app is imported once in the master process (Flask, pandas, TensorFlow and
+# the prepared outbreak data) and the workers are forked from it, so they share
+# those pages copy-on-write instead of each paying the import cost. The two
+# .keras models are small (~1.6 MB) but TensorFlow is not fork-safe once its
+# runtime has executed ops - a preloaded model hangs on its first predict in a
+# forked worker - so each worker loads its own copy of the weights in post_fork.
+# It does so before it accepts connections: workers are recycled (max_requests),
+# and a replacement must not answer 503 while its models load.
+#
+# Sizing: every worker runs its own TensorFlow inference with
+# PREDICTOR_TF_THREADS intra-op threads, so by default we start
+# cores // PREDICTOR_TF_THREADS workers to keep the CPUs busy without
+# oversubscribing them. Set WEB_CONCURRENCY to override the worker count.
+# GUNICORN_THREADS request threads per worker handle I/O-bound requests
+# (/api/data, polling) while another thread is inside model.predict.
+import multiprocessing
+import os
+
+tf_threads = max(1, int(os.environ.get('PREDICTOR_TF_THREADS', 1)))
+
+# Read when TensorFlow's runtime starts, i.e. when each worker loads its models
+os.environ.setdefault('PREDICTOR_TF_THREADS', str(tf_threads))
+os.environ.setdefault('TF_NUM_INTRAOP_THREADS', str(tf_threads))
+os.environ.setdefault('TF_NUM_INTEROP_THREADS', '1')
+os.environ.setdefault('OMP_NUM_THREADS', str(tf_threads))
+os.environ['PREDICTOR_DEFER_MODEL_LOAD'] = '1'
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', max(1, multiprocessing.cpu_count() // tf_threads)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+
+# First predictions can be slow while TensorFlow traces the models
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so slow leaks cannot grow without bound
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    # Import TensorFlow in the master so its libraries are shared with the workers.
+    # Nothing runs on its runtime here, which keeps forking safe.
+    import data.keras_layers  # noqa: F401
+    # Parse the CSV in the master too, so the cached rows are shared by the workers
+    from data.dataset_cache import dataset_cache
+    try:
+        dataset_cache.get()
+    except Exception as e:
+        print(f"Could not pre-load dataset cache: {e}")
+    server.log.info(f"Serving with {workers} workers x {threads} threads, {tf_threads} TF threads per worker")
+
+
+def post_fork(server, worker):
+    from data.model_integration import predictor
+    server.log.info(f"Worker {worker.pid} forked from preloaded app, loading its models")
+    # Synchronous: the worker starts accepting requests only once its models are warm
+    predictor.load_and_warm(prepare_data=False)
+    server.log.info(f"Worker {worker.pid} ready")
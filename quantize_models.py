@@ -0,0 +1,183 @@
+# quantize_models.py
+#
+# Post-training quantization of the .keras models, for PREDICTOR_MODEL_VARIANT:
+#
+#     python quantize_models.py
+#
+# Writes a dynamic-range (int8 weights) and a full-int8 (int8 weights and
+# activations) TFLite file per model, e.g. models/global_weekly_model.int8.tflite,
+# plus the float32 TFLite file if missing. The int8 activation ranges are
+# calibrated on real windows of wahis_outbreak_details.csv. Then every
+# variant is compared with the float Keras model on held-out windows: error in
+# outbreak counts, load time, memory and single-sample CPU latency. The report
+# is printed and written to models/quantization_report.md.
+import os
+import time
+
+os.environ.setdefault('PREDICTOR_DEFER_MODEL_LOAD', '1')
+
+import numpy as np
+import pandas as pd
+
+from data.keras_layers import custom_objects, load_model
+from data.inference_backends import (
+    MODEL_VARIANTS, KerasPredictBackend, TFLiteBackend, convert_to_tflite, tflite_path
+)
+from data.model_integration import INPUT_SHAPES, MODEL_FILES, predictor
+
+REPORT_PATH = os.path.join('models', 'quantization_report.md')
+MAX_CALIBRATION_SAMPLES = 200
+MAX_EVALUATION_SAMPLES = 5000
+LATENCY_ITERATIONS = 300
+
+
+def history_windows(model_type):
+    """
+    Every seq_len window of each country's row of the dense panel (as in
+    training), as model inputs dated like the following period, plus that
+    period's count.
+    """
+    snapshot = predictor.snapshot
+    panel = snapshot.panel(model_type)
+    scaler = snapshot.scaler(model_type)
+    seq_len, n_features = INPUT_SHAPES[model_type]
+    period_features = [snapshot.date_features(model_type, pd.Timestamp(start)) for start in panel.period_starts()]
+    inputs, targets = [], []
+    for country, country_id in snapshot.country_ids.items():
+        series = panel.row(country)
+        # Same arithmetic as MinMaxScaler.transform
+        scaled = series * scaler.scale_[0] + scaler.min_[0]
+        for end in range(seq_len, len(series)):
+            sample = np.empty((seq_len, n_features), dtype='float32')
+            sample[:, 0] = scaled[end - seq_len:end]
+            sample[:, 1] = country_id
+            sample[:, 2:] = period_features[end]
+            inputs.append(sample)
+            targets.append(series[end])
+    return np.array(inputs, dtype='float32').reshape((-1, seq_len, n_features)), np.array(targets)
+
+
+def split_windows(inputs, targets):
+    """Calibration and evaluation sets; with few windows both use all of them"""
+    order = np.random.default_rng(0).permutation(len(inputs))
+    if len(order) < 20:
+        return inputs, inputs, targets
+    n_calibration = min(MAX_CALIBRATION_SAMPLES, len(order) // 2)
+    calibration = order[:n_calibration]
+    evaluation = order[n_calibration:n_calibration + MAX_EVALUATION_SAMPLES]
+    return inputs[calibration], inputs[evaluation], targets[evaluation]
+
+
+def rss_bytes():
+    """Resident set size of this process (Linux), or None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def measure_load(load):
+    """Return (object, load seconds, RSS growth in bytes or None)"""
+    before = rss_bytes()
+    start = time.perf_counter()
+    loaded = load()
+    elapsed = time.perf_counter() - start
+    after = rss_bytes()
+    return loaded, elapsed, (after - before) if before is not None and after is not None else None
+
+
+def latency_ms(backend, samples):
+    for i in range(10):
+        backend(samples[i % len(samples)][None])
+    timings = np.empty(LATENCY_ITERATIONS)
+    for i in range(LATENCY_ITERATIONS):
+        sample = samples[i % len(samples)][None]
+        start = time.perf_counter()
+        backend(sample)
+        timings[i] = time.perf_counter() - start
+    return np.percentile(timings, 50) * 1000, np.percentile(timings, 99) * 1000
+
+
+def to_counts(model_type, scaled):
+    scaler = predictor.snapshot.scaler(model_type)
+    return scaler.inverse_transform(np.asarray(scaled).reshape(-1, 1))[:, 0]
+
+
+def errors(predicted, expected):
+    difference = predicted - expected
+    return float(np.abs(difference).mean()), float(np.sqrt((difference ** 2).mean()))
+
+
+def quantize_model(model_type):
+    """Write the TFLite variants of one model and return its report rows"""
+    model_file = MODEL_FILES[model_type]
+    model, load_seconds, load_rss = measure_load(
+        lambda: load_model(model_file, custom_objects=custom_objects, compile=False))
+
+    inputs, targets = history_windows(model_type)
+    if len(inputs) == 0:
+        print(f"No {model_type} country has enough history to calibrate, skipping")
+        return []
+    calibration, evaluation, actual = split_windows(inputs, targets)
+    print(f"{model_type}: {len(inputs)} windows, {len(calibration)} for calibration, {len(evaluation)} for evaluation")
+
+    keras_backend = KerasPredictBackend(model)
+    reference = to_counts(model_type, keras_backend(evaluation))
+    rows = [{
+        'model': model_type, 'variant': 'keras float32', 'size': os.path.getsize(model_file),
+        'load': load_seconds, 'rss': load_rss, 'latency': latency_ms(keras_backend, evaluation),
+        'vs_float': (0.0, 0.0), 'vs_actual': errors(reference, actual),
+    }]
+
+    for variant in MODEL_VARIANTS:
+        path = tflite_path(model_file, variant)
+        if variant != 'float' or not os.path.exists(path):
+            content = convert_to_tflite(model, INPUT_SHAPES[model_type], variant,
+                                        representative_inputs=calibration, custom_objects=custom_objects)
+            with open(path, 'wb') as f:
+                f.write(content)
+            print(f"Wrote {path} ({len(content) / 1024:.0f} KB)")
+
+        backend, load_seconds, load_rss = measure_load(lambda: TFLiteBackend(path, variant))
+        predicted = to_counts(model_type, backend(evaluation))
+        rows.append({
+            'model': model_type, 'variant': f'tflite {variant}', 'size': os.path.getsize(path),
+            'load': load_seconds, 'rss': load_rss, 'latency': latency_ms(backend, evaluation),
+            'vs_float': errors(predicted, reference), 'vs_actual': errors(predicted, actual),
+        })
+    return rows
+
+
+def format_report(rows):
+    lines = [
+        '| model | variant | file KB | load ms | RSS +MB | p50 ms | p99 ms | MAE vs float | RMSE vs float | MAE vs actual | RMSE vs actual |',
+        '|---|---|---|---|---|---|---|---|---|---|---|',
+    ]
+    for row in rows:
+        rss = f"{row['rss'] / 2 ** 20:.1f}" if row['rss'] is not None else 'n/a'
+        lines.append(
+            f"| {row['model']} | {row['variant']} | {row['size'] / 1024:.0f} | {row['load'] * 1000:.1f} | {rss} "
+            f"| {row['latency'][0]:.3f} | {row['latency'][1]:.3f} "
+            f"| {row['vs_float'][0]:.4f} | {row['vs_float'][1]:.4f} "
+            f"| {row['vs_actual'][0]:.3f} | {row['vs_actual'][1]:.3f} |"
+        )
+    lines.append('')
+    lines.append('Errors are in outbreaks per period on held-out history windows. '
+                 'RSS is the growth of this process while loading, so the first model loaded '
+                 'also pays for runtime initialisation.')
+    return '\n'.join(lines) + '\n'
+
+
+if __name__ == '__main__':
+    rows = []
+    for model_type, model_file in MODEL_FILES.items():
+        if os.path.exists(model_file):
+            rows.extend(quantize_model(model_type))
+        else:
+            print(f"Warning: Model file not found: {model_file}")
+    report = format_report(rows)
+    with open(REPORT_PATH, 'w') as f:
+        f.write(report)
+    print(report)
+    print(f"Report written to {REPORT_PATH}")
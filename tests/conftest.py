@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# Modules are imported as data.<module> from the repository root, as the app does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
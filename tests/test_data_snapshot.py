@@ -0,0 +1,93 @@
+# tests/test_data_snapshot.py
+import numpy as np
+import pandas as pd
+
+from data.data_snapshot import DataSnapshot
+
+COUNTRIES = ['Armenia', 'Brazil', 'Chile', 'Denmark']
+INPUT_SHAPES = {'weekly': (4, 5), 'monthly': (3, 5)}
+
+
+def frame(rows):
+    """A cleaned outbreak frame (country, start_date, cases, deaths) as prepare_data builds"""
+    return pd.DataFrame({
+        'country': [row[0] for row in rows],
+        'start_date': pd.to_datetime([row[1] for row in rows]),
+        'cases': [row[2] for row in rows],
+        'deaths': [row[3] for row in rows],
+    })
+
+
+BASE = frame([
+    ('Armenia', '2024-01-03', 10, 1),
+    ('Armenia', '2024-02-14', 4, 0),
+    ('Brazil', '2024-02-20', 7, 2),
+    ('Chile', '2024-03-05', 3, 0),
+    ('Brazil', '2024-04-01', 1, 1),
+])
+
+# Appended rows: Denmark has none before, one date precedes the panel and one extends it
+TAIL = frame([
+    ('Denmark', '2024-03-11', 2, 0),
+    ('Armenia', '2023-10-30', 5, 1),
+    ('Chile', '2024-07-22', 8, 3),
+])
+
+
+def build(df, snapshot=None, digest='0' * 40):
+    """Add df to a snapshot (a new one by default), fill its model inputs and complete it"""
+    snapshot = snapshot or DataSnapshot(COUNTRIES, INPUT_SHAPES)
+    snapshot.add_to_panels(df)
+    for interval in INPUT_SHAPES:
+        snapshot.refresh_model_inputs(interval)
+    snapshot.complete({'digest': digest})
+    return snapshot
+
+
+def contents(snapshot):
+    """Everything derived from the panels, as plain arrays"""
+    result = {}
+    for name in ('weekly_panel', 'monthly_panel', 'cases_panel', 'deaths_panel'):
+        panel = getattr(snapshot, name)
+        result[name] = (panel.first, panel.counts.copy())
+    for interval in INPUT_SHAPES:
+        inputs, scaler = snapshot.inputs(interval), snapshot.scaler(interval)
+        result[interval] = (inputs.tensor.copy(), inputs.valid.copy(), scaler.scale_.copy(), scaler.min_.copy())
+    result['stats'] = snapshot.stats.payload()['intervals']
+    return result
+
+
+def assert_same(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key in expected:
+        if key == 'stats':
+            assert actual[key] == expected[key]
+            continue
+        for a, b in zip(actual[key], expected[key]):
+            np.testing.assert_array_equal(a, b, err_msg=key)
+
+
+def test_successor_with_appended_rows_equals_full_build():
+    base = build(BASE, digest='a' * 40)
+    incremental = build(TAIL, snapshot=base.successor(), digest='b' * 40)
+    full = build(pd.concat([BASE, TAIL], ignore_index=True), digest='b' * 40)
+
+    assert_same(contents(incremental), contents(full))
+    assert incremental.version == full.version
+    assert incremental.monthly_panel.row('Denmark').sum() == 1
+    assert str(incremental.weekly_panel.period_starts()[0]) == '2023-10-30'
+    assert str(incremental.monthly_panel.period_starts()[-1]) == '2024-07-01'
+
+
+def test_successor_leaves_the_published_snapshot_unchanged():
+    base = build(BASE, digest='a' * 40)
+    before = contents(base)
+    inputs_before = (base.weekly_inputs, base.monthly_inputs, base.stats, base.version)
+
+    draft = build(TAIL, snapshot=base.successor(), digest='b' * 40)
+
+    assert_same(contents(base), before)
+    assert (base.weekly_inputs, base.monthly_inputs, base.stats, base.version) == inputs_before
+    for name in ('weekly_panel', 'monthly_panel', 'cases_panel', 'deaths_panel'):
+        assert getattr(draft, name) is not getattr(base, name)
+    assert draft.version != base.version
@@ -0,0 +1,70 @@
+# tests/test_input_tensors.py
+import threading
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from data.input_tensors import InputTensorBank
+from data.period_panel import PeriodPanel
+
+COUNTRIES = ['Armenia', 'Brazil', 'Chile']
+
+
+def filled_bank(seq_len=3):
+    panel = PeriodPanel('monthly', COUNTRIES)
+    panel.add(['Armenia', 'Armenia', 'Brazil', 'Chile'],
+              np.array(['2024-01-03', '2024-03-01', '2024-02-01', '2024-04-09'], dtype='datetime64[ns]'))
+    scaler = MinMaxScaler().fit(panel.counts.reshape(-1, 1).astype('float64'))
+    bank = InputTensorBank(COUNTRIES, seq_len)
+    bank.refresh(panel, scaler)
+    return panel, scaler, bank
+
+
+def test_tensor_rows_hold_scaled_windows():
+    panel, scaler, bank = filled_bank()
+
+    assert bank.valid.all()
+    for i, country in enumerate(COUNTRIES):
+        expected = scaler.transform(panel.window(country, 3).reshape(-1, 1).astype('float64'))[:, 0]
+        np.testing.assert_allclose(bank.tensor[i, :, 0], expected, rtol=1e-6)
+        assert (bank.tensor[i, :, 1] == i).all()
+
+    short = InputTensorBank(COUNTRIES, seq_len=10)
+    short.refresh(panel, scaler)
+    assert not short.valid.any()
+
+
+def test_sample_uses_a_scratch_buffer_per_thread():
+    _, _, bank = filled_bank()
+    samples = {}
+    barrier = threading.Barrier(2)
+
+    def sample(name, features):
+        array = bank.sample(0, features)
+        barrier.wait()  # Both threads have written their buffer before either reads it
+        samples[name] = (array, array.copy())
+
+    threads = [threading.Thread(target=sample, args=('a', (0.1, 0.2, 0.3))),
+               threading.Thread(target=sample, args=('b', (0.9, 0.8, 0.7)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    (buffer_a, a), (buffer_b, b) = samples['a'], samples['b']
+    assert buffer_a is not buffer_b
+    np.testing.assert_allclose(a[0, :, 2:], [[0.1, 0.2, 0.3]] * 3, rtol=1e-6)
+    np.testing.assert_allclose(b[0, :, 2:], [[0.9, 0.8, 0.7]] * 3, rtol=1e-6)
+    np.testing.assert_array_equal(a[0, :, :2], bank.tensor[0, :, :2])
+    # The bank itself is untouched
+    assert (bank.tensor[0, :, 2:] == 0).all()
+
+
+def test_country_without_outbreaks_is_not_valid():
+    panel = PeriodPanel('monthly', COUNTRIES)
+    panel.add(['Armenia', 'Brazil'], np.array(['2024-01-03', '2024-04-01'], dtype='datetime64[ns]'))
+    scaler = MinMaxScaler().fit(panel.counts.reshape(-1, 1).astype('float64'))
+    bank = InputTensorBank(COUNTRIES, seq_len=2)
+    bank.refresh(panel, scaler)
+
+    assert bank.valid.tolist() == [True, True, False]
@@ -0,0 +1,61 @@
+# tests/test_period_panel.py
+import numpy as np
+import pandas as pd
+
+from data.period_panel import PeriodPanel
+
+COUNTRIES = ['Armenia', 'Brazil', 'Chile']
+
+
+def naive_counts(interval, countries, dates):
+    """(n_countries, n_periods) counts by a plain pandas groupby, with every period in between"""
+    freq = 'W-SUN' if interval == 'weekly' else 'M'
+    periods = pd.Series(pd.to_datetime(dates)).dt.to_period(freq)
+    frame = pd.DataFrame({'country': countries, 'period': periods})
+    counts = frame.groupby(['country', 'period']).size().unstack(fill_value=0)
+    columns = pd.period_range(periods.min(), periods.max(), freq=freq)
+    return counts.reindex(index=COUNTRIES, columns=columns, fill_value=0).to_numpy()
+
+
+def test_bincount_fill_matches_groupby():
+    countries = ['Armenia', 'Brazil', 'Armenia', 'Chile', 'Armenia', 'Brazil']
+    dates = ['2024-01-01', '2024-01-07', '2024-01-08', '2024-03-15', '2024-03-17', '2024-05-31']
+    for interval in ('weekly', 'monthly'):
+        panel = PeriodPanel(interval, COUNTRIES)
+        assert panel.add(countries, np.array(dates, dtype='datetime64[ns]')) == len(dates)
+        np.testing.assert_array_equal(panel.counts, naive_counts(interval, countries, dates))
+        # 2024-01-01 is a Monday, so it starts both the first week and the first month
+        assert str(panel.period_starts()[0]) == '2024-01-01'
+
+
+def test_add_in_chunks_equals_one_add():
+    countries = ['Armenia', 'Brazil', 'Chile', 'Armenia', 'Unknown', 'Brazil']
+    dates = np.array(['2024-02-10', '2024-02-11', '2023-11-02', '2024-09-01', '2024-02-10', 'NaT'],
+                     dtype='datetime64[ns]')
+    whole = PeriodPanel('weekly', COUNTRIES)
+    assert whole.add(countries, dates) == 4
+
+    # Earlier dates prepend columns, later ones extend past the initial capacity
+    chunked = PeriodPanel('weekly', COUNTRIES, capacity=2)
+    for start in range(0, len(dates), 2):
+        chunked.add(countries[start:start + 2], dates[start:start + 2])
+
+    assert chunked.first == whole.first
+    np.testing.assert_array_equal(chunked.counts, whole.counts)
+
+
+def test_weights_sum_instead_of_counting():
+    panel = PeriodPanel('monthly', COUNTRIES)
+    panel.add(['Brazil', 'Brazil'], np.array(['2024-01-03', '2024-01-20'], dtype='datetime64[ns]'), weights=[5, 7])
+    assert panel.row('Brazil').tolist() == [12]
+
+
+def test_copy_is_independent():
+    panel = PeriodPanel('monthly', COUNTRIES)
+    panel.add(['Chile'], np.array(['2024-01-03'], dtype='datetime64[ns]'))
+    copy = panel.copy()
+    copy.add(['Chile', 'Armenia'], np.array(['2024-01-05', '2024-04-01'], dtype='datetime64[ns]'))
+
+    assert panel.n_periods == 1
+    assert panel.row('Chile').tolist() == [1]
+    assert copy.row('Chile').tolist() == [2, 0, 0, 0]
@@ -0,0 +1,84 @@
+# tests/test_prediction_cache.py
+from data.prediction_cache import PredictionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2, ttl=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    # Reading 'a' makes 'b' the least recently used
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.evictions == 1
+
+
+def test_put_replaces_and_refreshes_entry():
+    cache = PredictionCache(max_entries=2, ttl=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.put('a', 10)
+    cache.put('c', 3)
+
+    assert cache.get('a') == 10
+    assert cache.get('b') is None
+    assert len(cache) == 2
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = PredictionCache(max_entries=10, ttl=5, clock=clock)
+    cache.put('a', 1)
+
+    clock.now = 5
+    assert cache.get('a') == 1
+    clock.now = 5.5
+    assert cache.get('a', 'missing') == 'missing'
+    assert len(cache) == 0
+    assert cache.stats()['evictions'] == 1
+
+
+def test_byte_bound_evicts_oldest_until_under_cap():
+    cache = PredictionCache(max_entries=100, ttl=60, max_bytes=10, sizeof=len)
+    cache.put('a', 'xxxx')
+    cache.put('b', 'xxxx')
+    cache.put('c', 'xxxx')
+
+    assert cache.get('a') is None
+    assert cache.get('b') == 'xxxx'
+    assert cache.get('c') == 'xxxx'
+    assert cache.stats()['bytes'] == 8
+
+    # A replaced value's old size is released
+    cache.put('c', 'x')
+    assert cache.stats()['bytes'] == 5
+
+
+def test_byte_bound_keeps_a_single_oversized_entry():
+    cache = PredictionCache(max_entries=100, ttl=60, max_bytes=10, sizeof=len)
+    cache.put('a', 'x' * 4)
+    cache.put('big', 'x' * 50)
+
+    assert cache.get('a') is None
+    assert cache.get('big') == 'x' * 50
+    assert len(cache) == 1
+
+
+def test_clear_resets_size_and_bytes():
+    cache = PredictionCache(max_entries=10, ttl=60, max_bytes=100, sizeof=len)
+    cache.put('a', 'xyz')
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.stats()['bytes'] == 0
@@ -0,0 +1,77 @@
+# tests/test_prediction_memo.py
+import os
+
+# Importing the module creates the app's predictor; keep it from loading models in the background
+os.environ.setdefault('PREDICTOR_DEFER_MODEL_LOAD', '1')
+
+import pytest
+
+import data.model_integration as model_integration
+from data.data_snapshot import DataSnapshot
+from data.model_integration import INPUT_SHAPES, OutbreakPredictor
+
+
+@pytest.fixture
+def predictor():
+    return OutbreakPredictor()
+
+
+def snapshot_version(predictor, version):
+    """A completed-looking snapshot of the given data version"""
+    snapshot = DataSnapshot(predictor.snapshot.countries, INPUT_SHAPES)
+    snapshot.version = version
+    return snapshot
+
+
+class Counter:
+    """A compute() that counts its calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.calls
+
+
+def test_hits_for_the_same_key_data_and_models(predictor):
+    predictor.publish(snapshot_version(predictor, 'v1'))
+    compute = Counter()
+    key = ('predict', 'Thailand', 'weekly', (0.5, 0.25, 0.1))
+
+    assert predictor.memoized(predictor.snapshot, key, compute) == 1
+    assert predictor.memoized(predictor.snapshot, key, compute) == 1
+    assert predictor.memoized(predictor.snapshot, ('predict', 'Spain', 'weekly', (0.5, 0.25, 0.1)), compute) == 2
+    assert compute.calls == 2
+
+
+def test_misses_after_publishing_a_new_data_version(predictor):
+    predictor.publish(snapshot_version(predictor, 'v1'))
+    compute = Counter()
+    key = ('all-countries', 'monthly', (0.5, 0.5, 0.5))
+    predictor.memoized(predictor.snapshot, key, compute)
+
+    # Re-publishing the same version (a touched but unchanged CSV) keeps the results
+    predictor.publish(predictor.snapshot.with_csv_state({'digest': 'v1'}))
+    assert predictor.memoized(predictor.snapshot, key, compute) == 1
+
+    predictor.publish(snapshot_version(predictor, 'v2'))
+    assert predictor.memoized(predictor.snapshot, key, compute) == 2
+    assert compute.calls == 2
+
+
+def test_misses_after_models_are_reloaded(predictor, monkeypatch):
+    # No model files: load_model_files only swaps in "no model" and bumps model_version
+    monkeypatch.setattr(model_integration, 'MODEL_FILES', {})
+    predictor.publish(snapshot_version(predictor, 'v1'))
+    compute = Counter()
+    key = ('horizon', ('Thailand',), 'weekly', (0.5, 0.25, 0.1), 4)
+    predictor.memoized(predictor.snapshot, key, compute)
+
+    version = predictor.model_version
+    predictor.load_model_files()
+    assert predictor.model_version == version + 1
+
+    assert predictor.memoized(predictor.snapshot, key, compute) == 2
+    assert predictor.memoized(predictor.snapshot, key, compute) == 2
+    assert compute.calls == 2
@@ -0,0 +1,105 @@
+# tests/test_single_flight.py
+import threading
+
+import pytest
+
+from data.single_flight import SingleFlight
+
+N_CALLERS = 8
+
+
+def run_concurrently(flight, key, fn):
+    """Call flight.do(key, fn) from N_CALLERS threads; returns (results, errors)"""
+    results, errors = [], []
+
+    def caller():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(N_CALLERS)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def wait_for_waiters(flight, count):
+    """Block until count callers have joined the in-flight call"""
+    for _ in range(1000):
+        if flight.coalesced >= count:
+            return
+        threading.Event().wait(0.005)
+    raise AssertionError(f"only {flight.coalesced} of {count} callers coalesced")
+
+
+def test_concurrent_callers_share_one_invocation():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {'prediction': 3}
+
+    threads, results, errors = run_concurrently(flight, ('Thailand', 'weekly', None), compute)
+    wait_for_waiters(flight, N_CALLERS - 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert errors == []
+    assert len(results) == N_CALLERS
+    assert all(result is results[0] for result in results)
+
+
+def test_error_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise ValueError('model failed')
+
+    threads, results, errors = run_concurrently(flight, 'key', compute)
+    wait_for_waiters(flight, N_CALLERS - 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == []
+    assert len(errors) == N_CALLERS
+    assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_next_call_after_error_runs_again():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        flight.do('key', fail)
+    assert flight.do('key', lambda: 7) == 7
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+    assert flight.coalesced == 0
+
+
+def test_result_ttl_serves_finished_result_without_running_again():
+    flight = SingleFlight(result_ttl=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 5
+
+    assert flight.do('key', compute) == 5
+    assert flight.do('key', compute) == 5
+    assert calls == [1]